@@ -0,0 +1,175 @@
+import argparse
+import heapq
+import itertools
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GEN_DIR = os.path.join(BASE_DIR, "generators")
+WRITE_BUFFER = 1 << 20
+TAIL_BYTES = 64 * 1024
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+sys.path.insert(0, GEN_DIR)
+import _runtime as runtime  # noqa: E402
+from _logwriter import LogWriter  # noqa: E402
+
+def generate_service(task):
+    """
+    Write the flows of one generator from start to end on a virtual clock,
+    starting them at random (Poisson) times rate per second apart. Flows
+    overlap in time, so their lines wait in a heap until no later flow can
+    come before them. Returns (lines, bytes) written.
+    """
+    name, start, end, rate, error_ratio, seed, log_dir, max_bytes = task
+    module = runtime.load_generator(name)
+    runtime.rng.seed(f"{seed}:{name}")
+    runtime.error_ratio = error_ratio
+
+    pending = []  # (time, sequence, path, line)
+    sequence = itertools.count()
+    runtime.simulate(lambda path, text: heapq.heappush(pending, (runtime.now(), next(sequence), path, text)))
+
+    writers = {}
+    lines = size = 0
+
+    def flush(until=None):
+        nonlocal lines, size
+        while pending and (until is None or pending[0][0] <= until):
+            _, _, path, text = heapq.heappop(pending)
+            out = writers.get(path)
+            if out is None:
+                out = writers[path] = LogWriter(os.path.join(log_dir, os.path.basename(path)),
+                                                flush_bytes=WRITE_BUFFER, flush_seconds=None,
+                                                max_bytes=max_bytes)
+            out.write(text)
+            lines += 1
+            size += len(text)
+
+    try:
+        moment = start
+        while moment < end:
+            runtime.set_clock(moment)
+            runtime.play(module.generate())
+            moment += timedelta(seconds=runtime.rng.expovariate(rate))
+            # Later flows start at moment or after, nothing of theirs goes before it
+            flush(moment)
+        flush()
+    finally:
+        for out in writers.values():
+            out.close()
+    return lines, size
+
+def segments(log_dir, log_file):
+    """The active file and rotated segments of log_file present in log_dir."""
+    pattern = re.compile(re.escape(os.path.basename(log_file)) + r"(\.\d+)?(\.gz|\.zst)?$")
+    return sorted(os.path.join(log_dir, f) for f in os.listdir(log_dir) if pattern.match(f))
+
+def last_timestamp(path):
+    """Time of the last line of a plain log that starts with one, or None."""
+    with open(path, "rb") as f:
+        f.seek(max(0, os.fstat(f.fileno()).st_size - TAIL_BYTES))
+        lines = f.read().split(b"\n")
+    for raw in reversed(lines):
+        try:
+            return datetime.strptime(raw[:19].decode("ascii"), TS_FORMAT)
+        except (UnicodeDecodeError, ValueError):
+            continue
+    return None
+
+def out_of_order(path, start):
+    """
+    Whether appending lines from start on to path would leave it out of time
+    order, which the analyzer's time bisect relies on. Compressed segments
+    are not read and always count.
+    """
+    if os.path.getsize(path) == 0:
+        return False
+    if path.endswith((".gz", ".zst")):
+        return True
+    last = last_timestamp(path)
+    return last is None or last >= start
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write hours of backdated, time-ordered generator traffic as fast as possible.")
+    parser.add_argument("--hours", type=float, default=1.0,
+                        help="length of the generated period (default: 1)")
+    parser.add_argument("--end", metavar="'YYYY-MM-DD HH:MM'",
+                        help="end of the generated period (default: now)")
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="flows started per second by each generator (default: 1)")
+    parser.add_argument("--error-ratio", type=float, metavar="RATIO",
+                        help="failure probability of every success/failure decision "
+                             "(default: each generator's own)")
+    parser.add_argument("--seed", default="0",
+                        help="random seed; the same seed and --end give the same logs (default: 0)")
+    parser.add_argument("--services", metavar="NAMES",
+                        help="comma list of generators to run (default: all)")
+    parser.add_argument("--log-dir", default=os.path.join(BASE_DIR, "bulk-logs"),
+                        help="directory the logs are appended to (default: bulk-logs/)")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="remove the existing logs of the generators first instead of refusing "
+                             "to append to logs with lines from the generated period or later")
+    parser.add_argument("--max-mb", type=float, default=0,
+                        help="rotate a log to .1, .2, ... before it grows beyond this size (default: never)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of generators run in parallel processes (default: 1)")
+    args = parser.parse_args()
+
+    names = runtime.generator_names()
+    if args.services:
+        wanted = [name.strip() for name in args.services.split(",") if name.strip()]
+        unknown = sorted(set(wanted) - set(names))
+        if unknown:
+            parser.error(f"unknown generators: {', '.join(unknown)}")
+        names = [name for name in names if name in wanted]
+    if args.rate <= 0 or args.hours <= 0:
+        parser.error("--rate and --hours must be positive")
+    if args.error_ratio is not None and not 0 <= args.error_ratio <= 1:
+        parser.error("--error-ratio must be between 0 and 1")
+    try:
+        end = datetime.strptime(args.end, "%Y-%m-%d %H:%M") if args.end else datetime.now()
+    except ValueError as e:
+        parser.error(f"invalid --end: {e}")
+    start = end - timedelta(hours=args.hours)
+
+    os.makedirs(args.log_dir, exist_ok=True)
+    # Only spec generators name their log up front
+    log_files = [getattr(runtime.load_generator(name), "log_file", None) for name in names]
+    existing = [path for log_file in log_files if log_file for path in segments(args.log_dir, log_file)]
+    if args.overwrite:
+        for path in existing:
+            os.remove(path)
+    else:
+        clashes = [os.path.basename(path) for path in existing if out_of_order(path, start)]
+        if clashes:
+            parser.error(f"{', '.join(clashes)} in {args.log_dir} already hold lines from "
+                         f"{start:%Y-%m-%d %H:%M} or later; use --overwrite or another --log-dir")
+    print(f"🚀 Writing {start:%Y-%m-%d %H:%M} .. {end:%Y-%m-%d %H:%M} for {len(names)} generators\n")
+    max_bytes = int(args.max_mb * 1024 * 1024)
+    tasks = [(name, start, end, args.rate, args.error_ratio, args.seed, args.log_dir, max_bytes)
+             for name in names]
+
+    began = time.perf_counter()
+    if args.workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(generate_service, tasks))
+    else:
+        results = map(generate_service, tasks)
+    total_lines = total_bytes = 0
+    for name, (lines, size) in zip(names, results):
+        print(f"▶ {name}: {lines} lines, {size / 1e6:.1f} MB")
+        total_lines += lines
+        total_bytes += size
+    elapsed = time.perf_counter() - began
+
+    print(f"\n✅ {total_lines} lines, {total_bytes / 1e6:.1f} MB in {elapsed:.1f}s "
+          f"({total_lines / elapsed:,.0f} lines/s, {total_bytes / 1e6 / elapsed:.1f} MB/s)")
+
+if __name__ == "__main__":
+    main()
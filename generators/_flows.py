@@ -0,0 +1,355 @@
+import json
+import os
+import string
+import sys
+from datetime import datetime, timedelta
+from operator import itemgetter
+
+import _runtime as runtime
+
+# Declarative generators. A spec generators/<name>.json describes one service:
+#
+#   "log"      file the lines are appended to
+#   "gap"      [low, high] seconds between flow starts when run live
+#   "line"     template of every line, e.g. "{ts} {level:<5} [{class}] ({thread}) {message}"
+#   "classes"  short names for logger classes used by the steps
+#   "fields"   expressions drawn again on every use in a template ("ts" is built in)
+#   "parts"    named step lists the steps can include with {"do": name}
+#   "steps"    one flow, run in order:
+#       {"log": LEVEL, "class": ..., "message": TEMPLATE, other: constant, ...}
+#       {"set": {"name" or "name.key.0": EXPRESSION, ...}}   flow values, in order
+#       {"pause": [low, high]}
+#       {"if": EXPRESSION, "then": [...], "else": [...]}
+#       {"repeat": EXPRESSION, "steps": [...]}
+#       {"do": PART}
+#       {"end": true}
+#
+# Templates are str.format text whose fields name step constants, flow values
+# or fields (in that order), with dotted paths into dicts and lists; the
+# format spec "json" writes a value with json.dumps. Random values are drawn in
+# the order the text names them. Expressions are JSON values, evaluated
+# recursively, or objects with one "$" operator:
+#
+#   {"$int": [lo, hi]}    {"$digits": [lo, hi]} (as text)    {"$choice": [...]}
+#   {"$uniform": [lo, hi]}    {"$uuid": null}    {"$hex": length}    {"$millis": null}
+#   {"$time": strftime format, "%3f" for milliseconds, null for str(), "minutes": offset}
+#   {"$text": TEMPLATE}    {"$value": "name.key"}    {"$succeeds": p}    {"$chance": p}
+#
+# with optional "times" and "round" applied to the result. "$succeeds" is a
+# success/failure decision that --error-ratio overrides, "$chance" is not.
+#
+# A spec is compiled once: every template becomes one format string and the
+# getters of its fields, constants are folded in, so a line costs a few
+# lookups, random draws and one str.format call. Only step lists that can
+# reach a pause run as generators, the others are plain loops.
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S,%3f"
+ONE_SECOND = timedelta(seconds=1)
+
+class End(Exception):
+    """Raised by an "end" step to finish the flow."""
+
+class Flow:
+    """A compiled spec, with the generate() and run() of a generator module."""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.log_file = spec["log"]
+        self.gap = spec.get("gap", [1.0, 1.0])
+        self.classes = spec.get("classes", {})
+        self.line = spec["line"]
+        self.value_names = set()
+        for steps in [spec["steps"], *spec.get("parts", {}).values()]:
+            self._collect_names(steps)
+        specs = {"ts": {"$time": TS_FORMAT}, **spec.get("fields", {})}
+        for field in specs:
+            if field in self.value_names:
+                raise ValueError(f"{name}: {field!r} is both a field and a flow value")
+        # Fields may use each other, so they are compiled once all names are known
+        self.fields = dict.fromkeys(specs)
+        for field, expression in specs.items():
+            self.fields[field] = self._expression(expression)
+        self.part_specs = spec.get("parts", {})
+        self.parts = {}
+        self.steps, self.pauses = self._block(spec["steps"])
+
+    def generate(self):
+        values = {}
+        try:
+            if self.pauses:
+                yield from self.steps(values)
+            else:
+                self.steps(values)
+        except End:
+            pass
+
+    def run(self):
+        runtime.run_flows(self.generate, lambda: runtime.rng.uniform(*self.gap))
+
+    # ---------- compiling ----------
+    def _collect_names(self, steps):
+        for step in steps:
+            for name in step.get("set", ()):
+                self.value_names.add(name.split(".")[0])
+            for key in ("then", "else", "steps"):
+                self._collect_names(step.get(key, ()))
+
+    def _block(self, steps):
+        """
+        steps -> (run, pauses). run(values) runs the steps; when pauses is
+        true it returns an iterable of the pauses, else nothing.
+        """
+        compiled = [self._step(step) for step in steps]
+        if not any(pauses for _, pauses in compiled):
+            return run_steps([run for run, _ in compiled]), False
+        # Runs of steps without pauses between the pausing ones run as one
+        groups = []
+        for run, pauses in compiled:
+            if pauses:
+                groups.append(run)
+            elif groups and isinstance(groups[-1], list):
+                groups[-1].append(run)
+            else:
+                groups.append([run])
+        return run_pausing([plain(run_steps(group)) if isinstance(group, list) else group
+                            for group in groups]), True
+
+    def _step(self, step):
+        """step -> (run, pauses), as for _block."""
+        if "log" in step:
+            return self._log(step), False
+        if "set" in step:
+            return self._set(step["set"]), False
+        if "pause" in step:
+            low, high = step["pause"]
+            return (lambda values: (runtime.rng.uniform(low, high),)), True
+        if "if" in step:
+            condition = self._expression(step["if"])
+            (then, then_pauses), (otherwise, otherwise_pauses) = \
+                self._block(step.get("then", [])), self._block(step.get("else", []))
+            pauses = then_pauses or otherwise_pauses
+            if pauses:
+                then = then if then_pauses else plain(then)
+                otherwise = otherwise if otherwise_pauses else plain(otherwise)
+            return (lambda values: (then if condition(values) else otherwise)(values)), pauses
+        if "repeat" in step:
+            times = self._expression(step["repeat"])
+            body, pauses = self._block(step["steps"])
+            repeat = repeat_pausing if pauses else repeat_steps
+            return (lambda values: repeat(body, times(values), values)), pauses
+        if "do" in step:
+            return self._part(step["do"])
+        if step.get("end"):
+            return end, False
+        raise ValueError(f"{self.name}: unknown step {step}")
+
+    def _part(self, name):
+        if name not in self.parts:
+            if name not in self.part_specs:
+                raise ValueError(f"{self.name}: unknown part {name!r}")
+            self.parts[name] = None  # guards against a part that includes itself
+            self.parts[name] = self._block(self.part_specs[name])
+        if self.parts[name] is None:
+            raise ValueError(f"{self.name}: part {name!r} includes itself")
+        return self.parts[name]
+
+    def _log(self, step):
+        constants = {key: value for key, value in step.items() if key not in ("log", "message")}
+        constants["level"] = step["log"]
+        if "class" in step:
+            constants["class"] = self.classes.get(step["class"], step["class"])
+        pattern, getters = self._template(self.line, constants, step.get("message", ""))
+        pattern += "\n"
+        path = self.log_file
+        append = runtime.append
+
+        def log(values):
+            append(path, pattern.format(*[get(values) for get in getters]))
+        return log
+
+    def _set(self, assignments):
+        targets = []
+        for name, expression in assignments.items():
+            root, *keys = [int(key) if key.isdigit() else key for key in name.split(".")]
+            targets.append((root, keys, self._expression(expression)))
+
+        def assign(values):
+            for root, keys, expression in targets:
+                if keys:
+                    target = values[root]
+                    for key in keys[:-1]:
+                        target = target[key]
+                    target[keys[-1]] = expression(values)
+                else:
+                    values[root] = expression(values)
+        return assign
+
+    def _template(self, text, constants=None, message=None):
+        """text -> (format string, getters of its fields in order)."""
+        pattern, getters = [], []
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            pattern.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is None:
+                continue
+            if conversion:
+                raise ValueError(f"{self.name}: conversions are not supported: {text!r}")
+            if field == "message" and message is not None:
+                inner, inner_getters = self._template(message, constants)
+                pattern.append(inner)
+                getters.extend(inner_getters)
+                continue
+            root, *keys = [int(key) if key.isdigit() else key for key in field.split(".")]
+            if constants and root in constants:
+                value = lookup(constants[root], keys)
+                text_value = json.dumps(value) if spec == "json" else format(value, spec)
+                pattern.append(text_value.replace("{", "{{").replace("}", "}}"))
+                continue
+            getters.append(self._getter(root, keys, spec, text))
+            pattern.append("{}" if spec == "json" else "{:" + spec + "}")
+        return "".join(pattern), getters
+
+    def _getter(self, root, keys, spec, text):
+        if root in self.value_names:
+            get = itemgetter(root) if not keys else (lambda values: lookup(values[root], keys))
+        elif root in self.fields:
+            field = self.fields[root]
+            if field is None:  # a field using one compiled after it
+                fields = self.fields
+                field = lambda values: fields[root](values)
+            get = field if not keys else (lambda values: lookup(field(values), keys))
+        else:
+            raise ValueError(f"{self.name}: unknown field {root!r} in {text!r}")
+        if spec == "json":
+            return lambda values: json.dumps(get(values))
+        return get
+
+    def _expression(self, spec):
+        if isinstance(spec, list):
+            items = [self._expression(item) for item in spec]
+            return lambda values: [item(values) for item in items]
+        if not isinstance(spec, dict):
+            return lambda values: spec
+        operators = [key for key in spec if key.startswith("$")]
+        if not operators:
+            # Copy the constants in place, then fill in the rest in key order
+            template = {key: None if isinstance(item, (dict, list)) else item for key, item in spec.items()}
+            items = [(key, self._expression(item)) for key, item in spec.items() if isinstance(item, (dict, list))]
+
+            def build(values):
+                built = template.copy()
+                for key, item in items:
+                    built[key] = item(values)
+                return built
+            return build
+        if len(operators) > 1:
+            raise ValueError(f"{self.name}: more than one operator in {spec}")
+        operator = operators[0]
+        build = OPERATORS.get(operator)
+        if build is None:
+            raise ValueError(f"{self.name}: unknown operator {operator!r}")
+        expression = build(self, spec[operator], spec)
+        if "times" in spec:
+            factor, inner = spec["times"], expression
+            expression = lambda values: inner(values) * factor
+        if "round" in spec:
+            digits, unrounded = spec["round"], expression
+            expression = lambda values: round(unrounded(values), digits)
+        return expression
+
+def lookup(value, keys):
+    for key in keys:
+        value = value[key]
+    return value
+
+def run_steps(steps):
+    def run(values):
+        for step in steps:
+            step(values)
+    return run
+
+def run_pausing(steps):
+    def run(values):
+        for step in steps:
+            yield from step(values)
+    return run
+
+def plain(run):
+    """A run without pauses as one that returns none."""
+    def pausing(values):
+        run(values)
+        return ()
+    return pausing
+
+def repeat_steps(run, times, values):
+    for _ in range(times):
+        run(values)
+
+def repeat_pausing(run, times, values):
+    for _ in range(times):
+        yield from run(values)
+
+def end(values):
+    raise End()
+
+# ---------- expressions ----------
+def _time(flow, fmt, spec):
+    offset = timedelta(minutes=spec.get("minutes", 0))
+    if fmt is None or "%f" in fmt:
+        return lambda values: str(runtime.now() + offset) if fmt is None else (runtime.now() + offset).strftime(fmt)
+    pieces = fmt.split("%3f")
+    last = [None, None]  # the clock stands still between pauses in bulk mode
+    # Everything but the milliseconds stays the same for a second
+    second = [datetime.min, datetime.min, pieces]  # start, stop, formatted pieces
+
+    def moment_text(values):
+        moment = runtime.now()
+        if moment == last[0]:
+            return last[1]
+        shifted = moment + offset if offset else moment
+        start, stop, texts = second
+        if not start <= shifted < stop:
+            start = shifted.replace(microsecond=0)
+            texts = [start.strftime(piece) for piece in pieces]
+            second[:] = start, start + ONE_SECOND, texts
+        text = texts[0] if len(texts) == 1 else f"{shifted.microsecond // 1000:03d}".join(texts)
+        last[:] = moment, text
+        return text
+    return moment_text
+
+def _text(flow, template, spec):
+    pattern, getters = flow._template(template)
+    return lambda values: pattern.format(*[get(values) for get in getters])
+
+def _value(flow, name, spec):
+    root, *keys = [int(key) if key.isdigit() else key for key in name.split(".")]
+    return flow._getter(root, keys, "", name)
+
+OPERATORS = {
+    "$int": lambda flow, bounds, spec: lambda values: runtime.rng.randint(*bounds),
+    "$digits": lambda flow, bounds, spec: lambda values: str(runtime.rng.randint(*bounds)),
+    "$choice": lambda flow, options, spec: lambda values: runtime.rng.choice(options),
+    "$uniform": lambda flow, bounds, spec: lambda values: runtime.rng.uniform(*bounds),
+    "$uuid": lambda flow, _, spec: lambda values: str(runtime.uuid4()),
+    "$hex": lambda flow, length, spec: lambda values: runtime.uuid4().hex[:length],
+    "$millis": lambda flow, _, spec: lambda values: runtime.millis(),
+    "$succeeds": lambda flow, p, spec: lambda values: runtime.succeeds(p),
+    "$chance": lambda flow, p, spec: lambda values: runtime.rng.random() < p,
+    "$time": _time,
+    "$text": _text,
+    "$value": _value,
+}
+
+def load(path):
+    with open(path) as f:
+        spec = json.load(f)
+    return Flow(os.path.splitext(os.path.basename(path))[0], spec)
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit(f"usage: {sys.argv[0]} GENERATOR")
+    if sys.argv[1] not in runtime.generator_names():
+        sys.exit(f"unknown generator: {sys.argv[1]}")
+    runtime.load_generator(sys.argv[1]).run()
+
+if __name__ == "__main__":
+    main()
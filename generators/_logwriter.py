@@ -0,0 +1,122 @@
+import atexit
+import os
+import signal
+import sys
+import time
+
+# Long-lived, batching writers for the generator logs. Lines are collected in
+# memory and written with one write() once FLUSH_BYTES have piled up or the
+# oldest of them is FLUSH_SECONDS old; everything left is written at exit and
+# on SIGTERM (what start-all-logs.py sends). A file that would grow beyond
+# MAX_BYTES is rotated first: name.log -> name.log.1 -> ... -> name.log.BACKUPS,
+# the segment names log-analyzer.py reads as part of the service.
+
+FLUSH_BYTES = 64 * 1024
+FLUSH_SECONDS = 1.0
+MAX_BYTES = 100 * 1024 * 1024
+BACKUPS = 5
+
+class LogWriter:
+    def __init__(self, path, flush_bytes=FLUSH_BYTES, flush_seconds=FLUSH_SECONDS,
+                 max_bytes=MAX_BYTES, backups=BACKUPS):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        # None: flush on size and close only
+        self.flush_seconds = flush_seconds
+        # 0: never rotate
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.handle = None
+        self.size = 0
+        self.pending = []
+        self.pending_bytes = 0
+        self.oldest = None  # monotonic time of the oldest pending line
+        self.lines = 0
+
+    def write(self, text):
+        if not self.pending:
+            self.oldest = time.monotonic()
+        self.pending.append(text)
+        self.lines += 1
+        self.pending_bytes += len(text)
+        if self.pending_bytes >= self.flush_bytes or self.due(0):
+            self.flush()
+
+    def due(self, delay):
+        """Whether pending lines would be older than flush_seconds after delay seconds."""
+        return (self.pending and self.flush_seconds is not None
+                and time.monotonic() + delay - self.oldest >= self.flush_seconds)
+
+    def flush(self):
+        if not self.pending:
+            return
+        data = "".join(self.pending)
+        self.pending = []
+        self.pending_bytes = 0
+        if self.handle is None:
+            self._open()
+        if self.max_bytes and self.size and self.size + len(data) > self.max_bytes:
+            self._rotate()
+        self.handle.write(data)
+        self.handle.flush()
+        self.size += len(data)
+
+    def close(self):
+        self.flush()
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.handle = open(self.path, "a")
+        self.size = self.handle.tell()
+
+    def _rotate(self):
+        self.handle.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        # The file may have been removed behind our back, then there is nothing to keep
+        if os.path.exists(self.path):
+            if self.backups:
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+        self._open()
+
+# ---------- shared writers ----------
+_writers = {}
+
+def write(path, text):
+    writer = _writers.get(path)
+    if writer is None:
+        if not _writers:
+            _install_handlers()
+        writer = _writers[path] = LogWriter(path)
+    writer.write(text)
+
+def idle(seconds):
+    """Flush what would wait too long while the caller sleeps for seconds."""
+    for writer in _writers.values():
+        if writer.due(seconds):
+            writer.flush()
+
+def lines_written():
+    """Lines handed to the shared writers so far."""
+    return sum(writer.lines for writer in _writers.values())
+
+def close_all():
+    for writer in _writers.values():
+        writer.close()
+
+def _terminate(signum, frame):
+    close_all()
+    sys.exit(0)
+
+def _install_handlers():
+    atexit.register(close_all)
+    if signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+        signal.signal(signal.SIGTERM, _terminate)
@@ -0,0 +1,140 @@
+import heapq
+import importlib.util
+import itertools
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import _logwriter
+
+# Clock, randomness and output shared by the generators. By default they are
+# the real ones: wall-clock time, real sleeps, unseeded randomness and lines
+# batched by the shared _logwriter writers. generate-bulk-logs.py switches to
+# a virtual clock that sleeps advance instantly and sends every line to its
+# own writer.
+#
+# Every generator has a generate() that runs one flow. Flows that pause
+# between steps are generators yielding each pause in seconds, so whoever
+# runs them decides how to wait: play() sleeps, the bulk writer moves its
+# virtual clock, the in-process orchestrator awaits.
+
+GEN_DIR = os.path.dirname(os.path.abspath(__file__))
+# Flows of one generator in progress at once, and how much more often than
+# its own pace they start; start-all-logs.py sets them for its subprocesses
+CONCURRENCY = int(os.environ.get("GENERATOR_CONCURRENCY", 4))
+SPEED = float(os.environ.get("GENERATOR_SPEED", 1))
+
+rng = random.Random()
+
+# Failure probability of every success/failure decision, or None for each
+# flow's own ratio
+error_ratio = None
+
+_clock = None  # virtual datetime, None for real time
+_sink = None   # sink(path, text) that replaces the shared writers
+
+def now():
+    return datetime.now() if _clock is None else _clock
+
+def millis():
+    return int(now().timestamp() * 1000)
+
+def sleep(seconds):
+    global _clock
+    if _clock is None:
+        _logwriter.idle(seconds)
+        time.sleep(seconds)
+    else:
+        _clock += timedelta(seconds=seconds)
+
+def pauses(flow):
+    """The pauses of a flow returned by generate(), which is None without any."""
+    return () if flow is None else flow
+
+def play(flow):
+    """Run a flow to its end, sleeping through its pauses."""
+    for delay in pauses(flow):
+        sleep(delay)
+
+def uuid4():
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+def succeeds(probability):
+    """True with the given success probability, or 1 - error_ratio when set."""
+    if error_ratio is not None:
+        probability = 1 - error_ratio
+    return rng.random() < probability
+
+def append(path, text):
+    if _sink is not None:
+        _sink(path, text)
+    else:
+        _logwriter.write(path, text)
+
+def run_flows(generate, gap, concurrency=CONCURRENCY, speed=SPEED):
+    """
+    Run flows of generate() forever, starting each gap() / speed seconds after
+    the previous one started rather than after it ended, so several exchanges
+    are in progress at once and their lines interleave the way a real executor
+    pool writes them. A priority queue holds the time each running flow resumes
+    at; a start that finds concurrency flows running waits for one to end.
+    """
+    queue = [(now(), 0, None)]  # (time, sequence, flow or None to start one)
+    sequence = itertools.count(1)
+    running = 0
+    waiting = False
+    while True:
+        moment, _, flow = heapq.heappop(queue)
+        wait = (moment - now()).total_seconds()
+        if wait > 0:
+            sleep(wait)
+        if flow is None:
+            if running >= concurrency:
+                waiting = True
+                continue
+            running += 1
+            flow = iter(pauses(generate()))
+            heapq.heappush(queue, (moment + timedelta(seconds=gap() / speed), next(sequence), None))
+        delay = next(flow, None)
+        if delay is not None:
+            heapq.heappush(queue, (moment + timedelta(seconds=delay), next(sequence), flow))
+            continue
+        running -= 1
+        if waiting:
+            waiting = False
+            heapq.heappush(queue, (now(), next(sequence), None))
+
+# ---------- generator modules ----------
+# A generator is a flow spec, <name>.json compiled by _flows.py, or a script
+# <name>.py with its own generate() and run(), and a gap like a spec's when
+# its run() pauses between flows for other than about a second.
+def generator_names():
+    return sorted({os.path.splitext(f)[0] for f in os.listdir(GEN_DIR)
+                   if f.endswith((".py", ".json")) and not f.startswith("_")})
+
+def load_generator(name):
+    path = os.path.join(GEN_DIR, name + ".json")
+    if os.path.exists(path):
+        import _flows
+        return _flows.load(path)
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), os.path.join(GEN_DIR, name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def pace(generator):
+    """Flows a generator starts per second when run live, 1 / its mean gap."""
+    low, high = getattr(generator, "gap", (1.0, 1.0))
+    return 2 / (low + high)
+
+# ---------- virtual time ----------
+def simulate(sink):
+    """Run on a virtual clock from now on, handing all output to sink."""
+    global _sink
+    _sink = sink
+
+def set_clock(moment):
+    global _clock
+    _clock = moment
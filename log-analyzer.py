@@ -1,7 +1,30 @@
+import argparse
+import base64
+import csv
+import ctypes
+import ctypes.util
+import gzip
+import hashlib
+import heapq
+import io
+import json
+import math
+import mmap
 import os
 import re
+import select
+import struct
+import sys
+import time
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from collections import defaultdict
+
+try:
+    import zstandard
+except ImportError:  # .zst segments are skipped without it
+    zstandard = None
 
 LOG_DIR = "./logs"
 TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S,%f"
@@ -26,7 +49,23 @@ SUCCESS_PATTERNS = {
     "passed": r'\bpassed\b',
 }
 
-def parse_timestamp(line):
+# Integer timestamps are microseconds since EPOCH, taken from the naive local
+# time written by the generators, so they compare exactly like the datetimes.
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+# "YYYY-MM-DD HH:MM:SS" prefix -> epoch seconds, shared by all lines of a second
+SECOND_CACHE_SIZE = 4096
+_second_cache = {}
+_bucket_labels = {}
+
+def to_epoch_us(dt):
+    return (dt - EPOCH) // ONE_MICROSECOND
+
+def from_epoch_us(epoch_us):
+    return EPOCH + timedelta(microseconds=epoch_us)
+
+def _strptime_timestamp(line):
     try:
         # Try with microseconds
         return datetime.strptime(line[:23], TIMESTAMP_FORMAT)
@@ -37,39 +76,2232 @@ def parse_timestamp(line):
         except ValueError:
             return None
 
+def _parse_second(prefix):
+    """Epoch seconds for a fixed-layout 'YYYY-MM-DD HH:MM:SS' prefix, else None."""
+    if (len(prefix) != 19 or prefix[4] != "-" or prefix[7] != "-" or prefix[10] != " "
+            or prefix[13] != ":" or prefix[16] != ":"):
+        return None
+    digits = prefix[:4] + prefix[5:7] + prefix[8:10] + prefix[11:13] + prefix[14:16] + prefix[17:19]
+    if not (digits.isascii() and digits.isdigit()):
+        return None
+    try:
+        dt = datetime(int(prefix[:4]), int(prefix[5:7]), int(prefix[8:10]),
+                      int(prefix[11:13]), int(prefix[14:16]), int(prefix[17:19]))
+    except ValueError:
+        return None
+    return (dt - EPOCH) // timedelta(seconds=1)
+
+def parse_epoch_us(line):
+    """
+    Timestamp of a log line as integer microseconds since EPOCH, or None.
+    Reads the fixed 'YYYY-MM-DD HH:MM:SS,mmm' offsets directly and only falls
+    back to strptime for lines in any other layout.
+    """
+    prefix = line[:19]
+    seconds = _second_cache.get(prefix)
+    if seconds is None:
+        seconds = _parse_second(prefix)
+        if seconds is not None:
+            if len(_second_cache) >= SECOND_CACHE_SIZE:
+                _second_cache.clear()
+            _second_cache[prefix] = seconds
+
+    millis = line[20:23]
+    if seconds is not None and line[19:20] == "," and len(millis) == 3 and millis.isascii() and millis.isdigit():
+        return seconds * 1000000 + int(millis) * 1000
+
+    ts = _strptime_timestamp(line)
+    return to_epoch_us(ts) if ts else None
+
+def parse_timestamp(line):
+    epoch_us = parse_epoch_us(line)
+    return from_epoch_us(epoch_us) if epoch_us is not None else None
+
+# Aggregation buckets are epoch seconds integer-divided by the granularity
+GRANULARITY_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+DEFAULT_GRANULARITY = 3600
+
+def parse_granularity(text):
+    """Seconds of a granularity such as '10s', '1m', '1h' or '1d'."""
+    match = re.fullmatch(r"(\d+)([smhd])", text.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"invalid granularity {text!r}, expected e.g. 10s, 1m, 1h, 1d")
+    return int(match.group(1)) * GRANULARITY_UNITS[match.group(2)]
+
+def format_granularity(seconds):
+    for unit in ("d", "h", "m"):
+        if seconds % GRANULARITY_UNITS[unit] == 0:
+            return f"{seconds // GRANULARITY_UNITS[unit]}{unit}"
+    return f"{seconds}s"
+
+def bucket_title(seconds):
+    return {60: "Minute", 3600: "Hour", 86400: "Day"}.get(seconds, f"{format_granularity(seconds)} bucket")
+
+def bucket_label(bucket, seconds):
+    """Start time of a bucket, printed only as precisely as the granularity."""
+    label = _bucket_labels.get((seconds, bucket))
+    if label is None:
+        if seconds % 86400 == 0:
+            fmt = "%Y-%m-%d"
+        elif seconds % 3600 == 0:
+            fmt = "%Y-%m-%d %H:00"
+        elif seconds % 60 == 0:
+            fmt = "%Y-%m-%d %H:%M"
+        else:
+            fmt = "%Y-%m-%d %H:%M:%S"
+        label = from_epoch_us(bucket * seconds * 1000000).strftime(fmt)
+        _bucket_labels[(seconds, bucket)] = label
+    return label
+
+# Cheap literal that must be present for a pattern to match at all. Patterns
+# without an entry here are always handed to the regex engine.
+PATTERN_LITERALS = {
+    "HTTP_400": '"',
+    "HTTP_504": "504",
+    "returncode=1": "returncode",
+    "ERROR_999": "999",
+    "duplicate_key": "duplicate key value violates unique constraint",
+    "failed": "failed",
+    "ERROR": "ERROR",
+    # success patterns are case-insensitive, literals are matched lowercased
+    "SUCCESS": "success",
+    "returnCode=0": '"returncode"',
+    "returncode=0": "returncode",
+    "Response =>": "response => '{\"returncode\":\"0\"",
+    "Finalized Successfully": "finalized successfully",
+    "passed": "passed",
+}
+
+# Fallback checks run when no named pattern matched
+HTTP_STATUS_PATTERN = r'"\s+(?P<status>\d{3})\s+'
+RETURNCODE_PATTERN = r'"returnCode"\s*:\s*"(?P<code>[^0]\d*)"'
+
+
+class LineClassifier:
+    """
+    Compiled form of ERROR_PATTERNS / SUCCESS_PATTERNS and the fallback checks.
+
+    Rules keep the priority order of the original one-regex-at-a-time scan
+    (errors, then successes, then HTTP status, then returnCode). Literal
+    prefilters decide which rules can possibly match a line; the candidates
+    are joined into one alternation of named groups, compiled once per
+    candidate set and cached.
+    """
+
+    HTTP_STATUS = "__http_status"
+    RETURNCODE = "__returncode"
+
+    def __init__(self, error_patterns, success_patterns):
+        # (name, is_error, regex source, prefilter literal, literal is lowercase)
+        rules = []
+        for name, pattern in error_patterns.items():
+            rules.append((name, True, pattern, PATTERN_LITERALS.get(name), False))
+        for name, pattern in success_patterns.items():
+            rules.append((name, False, f"(?i:{pattern})", PATTERN_LITERALS.get(name), True))
+        rules.append((self.HTTP_STATUS, None, HTTP_STATUS_PATTERN, '"', False))
+        rules.append((self.RETURNCODE, True, RETURNCODE_PATTERN, '"returnCode"', False))
+
+        self.rules = rules
+        self.all_mask = (1 << len(rules)) - 1
+        self.success_mask = 0
+        self.http_bit = 1 << (len(rules) - 2)
+        self.literals = []
+        self.always_mask = 0
+        for i, (name, is_error, _, literal, lowered) in enumerate(rules):
+            if is_error is False:
+                self.success_mask |= 1 << i
+            if literal is None:
+                self.always_mask |= 1 << i
+            else:
+                self.literals.append((1 << i, literal, lowered))
+        self._compiled = {}
+
+    def _pattern(self, mask):
+        compiled = self._compiled.get(mask)
+        if compiled is None:
+            parts = [
+                f"(?P<r{i}>{pattern})"
+                for i, (_, _, pattern, _, _) in enumerate(self.rules)
+                if mask & (1 << i)
+            ]
+            compiled = self._compiled[mask] = self._compile("|".join(parts))
+        return compiled
+
+    def _compile(self, source):
+        return re.compile(source)
+
+    def _text(self, value):
+        return value
+
+    def _candidates(self, message):
+        mask = self.always_mask
+        ascii_only = message.isascii()
+        lowered = message.lower() if ascii_only else None
+        for bit, literal, is_lower in self.literals:
+            if is_lower:
+                # Non-ASCII text can case-fold onto ASCII letters, skip the filter
+                if not ascii_only or literal in lowered:
+                    mask |= bit
+            elif literal in message:
+                mask |= bit
+        return mask
+
+    def classify(self, message):
+        mask = self._candidates(message)
+
+        # Special case: if line has both ERROR and SUCCESS, prioritize error
+        if "ERROR:" in message and "SUCCESS" in message:
+            mask &= ~self.success_mask
+
+        return self._resolve(message, 0, len(message), mask)
+
+    def _resolve(self, buf, pos, end, mask):
+        """Best-priority result among the candidate rules in mask for buf[pos:end]."""
+        result = (None, None)
+        while mask:
+            match = self._pattern(mask).search(buf, pos, end)
+            if match is None:
+                break
+
+            index = int(match.lastgroup[1:])
+            name, is_error, _, _, _ = self.rules[index]
+            # Alternatives are tried in priority order, so nothing ranked higher
+            # matches at or before this position; only better rules remain.
+            pos = match.start() + 1
+            lower_mask = (1 << index) - 1
+
+            if name == self.HTTP_STATUS:
+                # Only the first status code on the line is considered
+                status = self._text(match.group("status"))
+                if status.startswith('4') or status.startswith('5'):
+                    result = (True, f"HTTP_{status}")
+                elif status.startswith('2'):
+                    result = (False, f"HTTP_{status}")
+                else:
+                    mask &= ~self.http_bit
+                    continue
+            elif name == self.RETURNCODE:
+                result = (True, f"returnCode={self._text(match.group('code'))}")
+            else:
+                result = (is_error, name)
+            mask &= lower_mask
+
+        return result
+
+
+class BufferClassifier(LineClassifier):
+    """
+    LineClassifier for byte chunks of a log (slices of an mmap). Rule
+    literals are located with find() over the whole chunk, so only lines
+    that some rule could match are visited; those are classified with
+    bytes regexes and never decoded. Only valid for lines passed by
+    needs_text_path(): str and bytes patterns agree on plain ASCII, but
+    not on other bytes.
+    """
+
+    # Literals shorter than this hit nearly every line, such rules are
+    # located with their own regex instead
+    MIN_FIND_LITERAL = 3
+
+    def __init__(self, error_patterns, success_patterns):
+        super().__init__(error_patterns, success_patterns)
+        # (rule bit, literal, literal is lowercase, regex): how each rule is
+        # located in a chunk
+        self.finders = []
+        for i, (_, _, pattern, literal, lowered) in enumerate(self.rules):
+            if literal is not None and len(literal) >= self.MIN_FIND_LITERAL:
+                self.finders.append((1 << i, literal.encode(), lowered, None))
+            else:
+                # Multiline keeps ^ and $ anchored to lines inside a chunk
+                self.finders.append((1 << i, None, False, re.compile(pattern.encode("ascii"), re.MULTILINE)))
+
+    def _compile(self, source):
+        return re.compile(source.encode("ascii"))
+
+    def _text(self, value):
+        return value.decode("ascii")
+
+    def candidate_lines(self, chunk):
+        """
+        (start offset, candidate rule mask) for the lines of chunk that may
+        classify or need the text path, in file order.
+        """
+        starts = {}
+        lowered = chunk.lower()
+        finders = self.finders
+        if not chunk.isascii() or any(sep in chunk for sep in _TEXT_ONLY_SEPARATORS):
+            finders = finders + [(0, None, False, _TEXT_ONLY_BYTES)]
+        for bit, literal, is_lower, regex in finders:
+            haystack = lowered if is_lower else chunk
+            pos = 0
+            while True:
+                if regex is None:
+                    hit = haystack.find(literal, pos)
+                else:
+                    match = regex.search(chunk, pos)
+                    hit = -1 if match is None else match.start()
+                if hit < 0:
+                    break
+                start = chunk.rfind(b"\n", 0, hit) + 1
+                starts[start] = starts.get(start, 0) | bit
+                # One hit per line is enough, go on from the next line
+                pos = chunk.find(b"\n", hit) + 1
+                if pos == 0:
+                    break
+        return sorted(starts.items())
+
+    def classify_bytes(self, line, mask):
+        """classify() for a line whose candidate rules candidate_lines() found."""
+        # Special case: if line has both ERROR and SUCCESS, prioritize error
+        if b"ERROR:" in line and b"SUCCESS" in line:
+            mask &= ~self.success_mask
+
+        return self._resolve(line, 0, len(line), mask)
+
+
+CLASSIFIER = LineClassifier(ERROR_PATTERNS, SUCCESS_PATTERNS)
+BUFFER_CLASSIFIER = BufferClassifier(ERROR_PATTERNS, SUCCESS_PATTERNS)
+
+# Bytes on which str and bytes regexes disagree: non-ASCII, and the ASCII
+# separators \x1c-\x1f that only str patterns treat as whitespace
+_TEXT_ONLY_BYTES = re.compile(rb"[\x1c-\x1f\x80-\xff]")
+_TEXT_ONLY_SEPARATORS = (b"\x1c", b"\x1d", b"\x1e", b"\x1f")
+
+def needs_text_path(line):
+    return not line.isascii() or any(sep in line for sep in _TEXT_ONLY_SEPARATORS)
+
 def detect_error_success(message):
     """
     Detect if line contains error or success.
     Returns: (is_error, error_type) or (is_success, success_type)
     """
-    # Check for error patterns first
-    for pattern_name, pattern in ERROR_PATTERNS.items():
-        if re.search(pattern, message):
-            return (True, pattern_name)
-    
-    # Check for success patterns
-    for pattern_name, pattern in SUCCESS_PATTERNS.items():
-        if re.search(pattern, message, re.IGNORECASE):
-            # Special case: if line has both ERROR and SUCCESS, prioritize error
-            if "ERROR:" in message and "SUCCESS" in message:
+    return CLASSIFIER.classify(message)
+
+# Concurrent executor threads can append lines slightly out of time order;
+# the window locator widens its seek/stop points by this much to catch them.
+ORDER_TOLERANCE_SECONDS = 5
+# Offsets sampled to check that order before trusting the bisect
+ORDER_PROBES = 16
+ORDER_PROBE_BACK_BYTES = 4096
+_unordered_warned = set()
+
+def _decode(raw):
+    return raw.decode("utf-8", errors="ignore")
+
+def _next_line_start(f, offset):
+    """Offset of the first line starting at or after offset."""
+    if offset <= 0:
+        return 0
+    f.seek(offset - 1)
+    f.readline()
+    return f.tell()
+
+def _first_timestamp_from(f, offset):
+    """Timestamp of the first parseable line starting at or after offset."""
+    f.seek(_next_line_start(f, offset))
+    for raw in f:
+        ts = parse_epoch_us(_decode(raw))
+        if ts is not None:
+            return ts
+    return None
+
+def locate_window_start(f, target_us, size):
+    """
+    Bisect byte offsets of a time-ordered file for the start of the first
+    line whose timestamp is >= target_us.
+    """
+    lo, hi = 0, size
+    while lo < hi:
+        mid = (lo + hi) // 2
+        ts = _first_timestamp_from(f, mid)
+        if ts is None or ts >= target_us:
+            hi = mid
+        else:
+            lo = mid + 1
+    return _next_line_start(f, lo)
+
+def in_time_order(f, size, offsets, tolerance_us):
+    """
+    Cheap check of what the bisect relies on: the first timestamps from
+    ORDER_PROBES evenly spaced offsets and the given ones never fall more
+    than tolerance_us below an earlier one.
+    """
+    probes = {size * i // ORDER_PROBES for i in range(ORDER_PROBES)}
+    latest = None
+    for offset in sorted(probes.union(offsets)):
+        ts = _first_timestamp_from(f, offset)
+        if ts is None:
+            continue
+        if latest is not None and ts < latest - tolerance_us:
+            return False
+        latest = ts if latest is None else max(latest, ts)
+    return True
+
+def window_byte_range(f, size, start_us, end_us, tolerance_s=ORDER_TOLERANCE_SECONDS):
+    """
+    Line-aligned [begin, end) byte range covering the window plus tolerance.
+    A file found out of time order around those points is read whole.
+    """
+    tolerance_us = tolerance_s * 1000000
+    begin = locate_window_start(f, start_us - tolerance_us, size)
+    end = locate_window_start(f, end_us + tolerance_us + 1, size)
+    # Also probe the lines just before the landing points
+    landings = (begin, max(0, begin - ORDER_PROBE_BACK_BYTES), end, max(0, end - ORDER_PROBE_BACK_BYTES))
+    if not in_time_order(f, size, landings, tolerance_us):
+        if f.name not in _unordered_warned:
+            _unordered_warned.add(f.name)
+            print(f"warning: {f.name} is not in time order within {tolerance_s}s, reading it whole",
+                  file=sys.stderr)
+        return 0, size
+    return begin, max(begin, end)
+
+def iter_window_lines(path, start_us, end_us, tolerance_s=ORDER_TOLERANCE_SECONDS,
+                      begin=None, end=None):
+    """
+    Yield (epoch_us, line) for every line of path inside [start_us, end_us].
+    Reads the byte range window_byte_range() gives, or the line-aligned
+    begin/end slice passed in; lines within tolerance_s of either edge are
+    still read and filtered. Compressed segments are streamed from their
+    start up to the first line past the window.
+    """
+    tolerance_us = tolerance_s * 1000000
+    compressed = compression_of(path) is not None
+    with open_log(path) as f:
+        if compressed:
+            # Compressed streams cannot seek, read from the start
+            begin = 0
+        elif begin is None:
+            size = os.fstat(f.fileno()).st_size
+            begin, end = window_byte_range(f, size, start_us, end_us, tolerance_s)
+        f.seek(begin)
+        stop_us = end_us + tolerance_us
+        offset = begin
+
+        for raw in f:
+            if end is not None and offset >= end:
+                break
+            offset += len(raw)
+            line = _decode(raw)
+            ts = parse_epoch_us(line)
+            if ts is None:
                 continue
-            return (False, pattern_name)
-    
-    # Check for HTTP status codes in access logs
-    http_match = re.search(r'"\s+(\d{3})\s+', message)
-    if http_match:
-        status = http_match.group(1)
-        if status.startswith('4') or status.startswith('5'):
-            return (True, f"HTTP_{status}")
-        elif status.startswith('2'):
-            return (False, f"HTTP_{status}")
-    
-    # Check for returnCode not equal to 0
-    returncode_match = re.search(r'"returnCode"\s*:\s*"([^0]\d*)"', message)
-    if returncode_match and returncode_match.group(1) != "0":
-        return (True, f"returnCode={returncode_match.group(1)}")
-    
-    return (None, None)
+            if compressed and ts > stop_us:
+                break
+            if start_us <= ts <= end_us:
+                yield ts, line
+
+# ---------- rotated / compressed segments ----------
+# service.log, service.log.1, service.log.2.gz, service.log.3.zst ...
+SEGMENT_PATTERN = re.compile(r"^(?P<service>.+?)\.log(?:\.(?P<seq>\d+))?(?P<ext>\.gz|\.zst)?$")
+READ_BUFFER = 1024 * 1024
+TAIL_PROBE_BYTES = 64 * 1024
+
+def compression_of(path):
+    if path.endswith(".gz"):
+        return "gz"
+    if path.endswith(".zst"):
+        return "zst"
+    return None
+
+def open_log(path):
+    """Binary, line-iterable handle on a plain, gzip or zstd log segment."""
+    compression = compression_of(path)
+    if compression == "gz":
+        return io.BufferedReader(gzip.open(path, "rb"), buffer_size=READ_BUFFER)
+    if compression == "zst":
+        if zstandard is None:
+            raise OSError(f"{path}: zstd segments need the 'zstandard' package")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_size=READ_BUFFER)
+        return io.BufferedReader(reader, buffer_size=READ_BUFFER)
+    return open(path, "rb", buffering=READ_BUFFER)
+
+def parse_segment_name(file):
+    """(service, rotation number or None, compression or None) of a log file name."""
+    match = SEGMENT_PATTERN.match(file)
+    if not match:
+        return file.replace(".log", ""), None, None
+    seq = match.group("seq")
+    return match.group("service"), int(seq) if seq else None, compression_of(file)
+
+def _last_timestamp(path):
+    """Timestamp of the last parseable line of a plain log, read from its tail."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        probe = TAIL_PROBE_BYTES
+        while True:
+            start = max(0, size - probe)
+            f.seek(start)
+            lines = f.read(size - start).split(b"\n")
+            if start > 0:
+                lines = lines[1:]  # first piece may be a partial line
+            for raw in reversed(lines):
+                ts = parse_epoch_us(_decode(raw))
+                if ts is not None:
+                    return ts
+            if start == 0:
+                return None
+            probe *= 4
+
+class LogSegment:
+    """
+    One file of a service's log: the active file or a rotated, possibly
+    compressed, predecessor. first_us/last_us bound the lines it holds;
+    for compressed segments last_us comes from the next newer segment so
+    the stream never has to be read to its end. Those bounds only hold for
+    a plain file found in time order; one that is not may hold any time.
+    """
+
+    def __init__(self, path, service, seq, compression):
+        self.path = path
+        self.service = service
+        self.seq = seq
+        self.compression = compression
+        self.first_us = None
+        self.last_us = None
+        self.ordered = True
+
+    def read_first_timestamp(self):
+        with open_log(self.path) as f:
+            for raw in f:
+                ts = parse_epoch_us(_decode(raw))
+                if ts is not None:
+                    self.first_us = ts
+                    break
+
+    def overlaps(self, start_us, end_us, tolerance_s=ORDER_TOLERANCE_SECONDS):
+        if self.first_us is None:
+            return False  # no timestamped lines at all
+        if not self.ordered:
+            return True
+        tolerance_us = tolerance_s * 1000000
+        if self.first_us > end_us + tolerance_us:
+            return False
+        return self.last_us is None or self.last_us >= start_us - tolerance_us
+
+def discover_segments(log_dir, progress=None):
+    """
+    Group the files of log_dir by service, oldest segment first, with the
+    time range of each segment filled in.
+    """
+    services = {}
+    for file in sorted(os.listdir(log_dir)):
+        path = os.path.join(log_dir, file)
+        if not os.path.isfile(path):
+            continue
+        service, seq, compression = parse_segment_name(file)
+        if compression == "zst" and zstandard is None:
+            if progress:
+                progress(f"Skipping {file}: install 'zstandard' to read .zst segments")
+            continue
+        segment = LogSegment(path, service, seq, compression)
+        segment.read_first_timestamp()
+        services.setdefault(service, []).append(segment)
+
+    for segments in services.values():
+        # Higher rotation numbers are older; the active file has none
+        segments.sort(key=lambda seg: (seg.first_us is None, seg.first_us or 0,
+                                       -(seg.seq if seg.seq is not None else -1)))
+        for seg, newer in zip(segments, segments[1:] + [None]):
+            if seg.compression is None:
+                seg.last_us = _last_timestamp(seg.path)
+                with open(seg.path, "rb") as f:
+                    seg.ordered = in_time_order(f, os.fstat(f.fileno()).st_size, (),
+                                                ORDER_TOLERANCE_SECONDS * 1000000)
+            elif newer is not None:
+                seg.last_us = newer.first_us
+    return services
+
+# Files whose in-window part is larger than this are split into several
+# byte ranges so a single big service log can use more than one worker.
+MIN_SPLIT_BYTES = 8 * 1024 * 1024
+# Slice of the mapping the mmap engine scans at a time
+MMAP_CHUNK_BYTES = 8 * 1024 * 1024
+
+Query = namedtuple("Query", "start_us end_us log_choice specific_error specific_success resolution engine "
+                            "distributions group_by top", defaults=(DEFAULT_GRANULARITY, "text", False, (), 10))
+
+def plan_segments(path, query, workers):
+    """Split the window of one file into line-aligned (begin, end) byte ranges."""
+    if compression_of(path):
+        return [(None, None)]  # streamed whole, cannot be split or seeked
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        begin, end = window_byte_range(f, size, query.start_us, query.end_us)
+        if workers <= 1 or end - begin <= MIN_SPLIT_BYTES:
+            return [(begin, end)]
+
+        pieces = min(workers, (end - begin) // MIN_SPLIT_BYTES)
+        step = (end - begin) // pieces
+        bounds = [begin]
+        for i in range(1, pieces):
+            bounds.append(max(bounds[-1], _next_line_start(f, begin + i * step)))
+        bounds.append(end)
+        return [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+SKETCH_ACCURACY = 0.01
+SKETCH_MAX_BINS = 2048
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch) of non-negative values. Bucket
+    bounds grow by a factor gamma, so every quantile is within
+    relative_accuracy of the exact one while memory only grows with the log
+    of the value range; two sketches merge exactly by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy=SKETCH_ACCURACY, max_bins=SKETCH_MAX_BINS):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        # bucket index i holds values in (gamma**(i-1), gamma**i]
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value, count=1):
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.count += count
+        self.sum += value * count
+        if value <= 0:
+            self.zero_count += count
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[index] = self.bins.get(index, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        # Fold the lowest buckets together, keeping the high quantiles exact
+        keys = sorted(self.bins)
+        target = keys[len(keys) - self.max_bins]
+        for key in keys[:len(keys) - self.max_bins]:
+            self.bins[target] += self.bins.pop(key)
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge sketches of different accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        return self
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return max(self.min, 0)
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def count_at_most(self, value):
+        """Values <= value, exact up to the relative accuracy around value."""
+        if value < 0:
+            return 0
+        if value == 0:
+            return self.zero_count
+        limit = math.ceil(math.log(value) / self._log_gamma)
+        return self.zero_count + sum(count for index, count in self.bins.items() if index <= limit)
+
+    def histogram(self, bounds):
+        """Counts of values in (previous bound, bound] per bound, then above the last."""
+        counts = []
+        below = 0
+        for bound in bounds:
+            at_most = self.count_at_most(bound)
+            counts.append(at_most - below)
+            below = at_most
+        counts.append(self.count - below)
+        return counts
+
+    def to_dict(self):
+        """JSON-ready form; from_dict() of it merges exactly with other sketches."""
+        return {
+            "accuracy": self.relative_accuracy,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "zero": self.zero_count,
+            "bins": sorted(self.bins.items()),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["accuracy"])
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        sketch.zero_count = data["zero"]
+        sketch.bins = {int(index): count for index, count in data["bins"]}
+        return sketch
+
+TOP_CAPACITY_FACTOR = 10
+MIN_TOP_CAPACITY = 100
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters in at most capacity counters. Counts are
+    exact while no more keys than that have been seen; after that a new
+    key takes over the smallest counter and inherits its count as a
+    possible overestimate (error). Every key seen more than total/capacity
+    times keeps a counter and no count is off by more than that. Summaries
+    of separate streams merge.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}  # key -> [count, error]
+        # One (count, key) entry per key; counts only grow, so a stale entry
+        # is refreshed when it reaches the top instead of on every add
+        self._heap = []
+
+    def add(self, key, count=1):
+        self.total += count
+        entry = self.counts.get(key)
+        if entry is not None:
+            entry[0] += count
+            return
+        low = 0
+        if len(self.counts) >= self.capacity:
+            heap = self._heap
+            while True:
+                stale, victim = heap[0]
+                current = self.counts[victim][0]
+                if current == stale:
+                    break
+                heapq.heapreplace(heap, (current, victim))
+            heapq.heappop(heap)
+            del self.counts[victim]
+            low = stale
+        self.counts[key] = [low + count, low]
+        heapq.heappush(self._heap, (low + count, key))
+
+    def _floor(self):
+        """Count a key without a counter may have had."""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(count for count, _ in self.counts.values())
+
+    def merge(self, other):
+        mine, theirs = self._floor(), other._floor()
+        merged = {}
+        for key in self.counts.keys() | other.counts.keys():
+            count, error = self.counts.get(key, (mine, mine))
+            other_count, other_error = other.counts.get(key, (theirs, theirs))
+            merged[key] = [count + other_count, error + other_error]
+        kept = sorted(merged.items(), key=lambda item: (-item[1][0], item[0]))[:self.capacity]
+        self.counts = dict(kept)
+        self._heap = [(entry[0], key) for key, entry in kept]
+        heapq.heapify(self._heap)
+        self.total += other.total
+        return self
+
+    def top(self, k):
+        """(key, count, error) of the k largest counters."""
+        rows = sorted(self.counts.items(), key=lambda item: (-item[1][0], item[0]))[:k]
+        return [(key, count, error) for key, (count, error) in rows]
+
+HLL_PRECISION = 12
+_HLL_INVERSE_POWERS = [2.0 ** -rank for rank in range(65)]
+
+class HyperLogLog:
+    """
+    HyperLogLog estimate of the number of distinct strings added, within
+    about 1.04 / sqrt(2 ** precision) (1.6% at 12 bits). Registers start
+    out sparse, as {index: rank}, and become a dense bytearray once the
+    dict would outgrow it, so the many small per-bucket counters stay
+    small. Values are hashed with blake2b, so sketches built in different
+    processes or runs merge by taking register maxima.
+    """
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.size = 1 << precision
+        self.sparse = {}
+        self.dense = None
+
+    def add(self, value):
+        h = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+        rest_bits = 64 - self.precision
+        index = h >> rest_bits
+        rank = rest_bits - (h & ((1 << rest_bits) - 1)).bit_length() + 1
+        self._set(index, rank)
+
+    def _set(self, index, rank):
+        if self.dense is not None:
+            if rank > self.dense[index]:
+                self.dense[index] = rank
+        elif rank > self.sparse.get(index, 0):
+            self.sparse[index] = rank
+            if len(self.sparse) > self.size // 64:
+                self._densify()
+
+    def _densify(self):
+        self.dense = bytearray(self.size)
+        for index, rank in self.sparse.items():
+            self.dense[index] = rank
+        self.sparse = {}
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLogs of different precision")
+        if other.dense is None:
+            for index, rank in other.sparse.items():
+                self._set(index, rank)
+            return self
+        if self.dense is None:
+            self._densify()
+        self.dense = bytearray(map(max, self.dense, other.dense))
+        return self
+
+    def estimate(self):
+        m = self.size
+        if self.dense is None:
+            zeros = m - len(self.sparse)
+            total = zeros + sum(_HLL_INVERSE_POWERS[rank] for rank in self.sparse.values())
+        else:
+            zeros = self.dense.count(0)
+            total = sum(map(_HLL_INVERSE_POWERS.__getitem__, self.dense))
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / total
+        # Linear counting is more accurate while many registers are still empty
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+    def to_dict(self):
+        """JSON-ready form; from_dict() of it merges with other sketches."""
+        if self.dense is None:
+            return {"precision": self.precision, "sparse": sorted(self.sparse.items())}
+        return {"precision": self.precision, "registers": base64.b64encode(self.dense).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["precision"])
+        if "registers" in data:
+            sketch.dense = bytearray(base64.b64decode(data["registers"]))
+        else:
+            sketch.sparse = {int(index): rank for index, rank in data["sparse"]}
+        return sketch
+
+BLOOM_INITIAL_CAPACITY = 1 << 14
+BLOOM_ERROR = 0.001
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows with its input: slice i holds up to
+    initial_capacity * 2**i values at a false positive rate of
+    error / 2**(i + 1), so the whole filter stays below error. Slice sizes
+    only depend on i and values are hashed with blake2b, so filters built
+    in separate processes merge by OR-ing their slices; the merged filter
+    contains both inputs, at up to the sum of their false positive rates.
+    """
+
+    def __init__(self, initial_capacity=BLOOM_INITIAL_CAPACITY, error=BLOOM_ERROR):
+        self.initial_capacity = initial_capacity
+        self.error = error
+        # [bits, bit count, hash count, capacity, values added]
+        self.slices = []
+
+    def _new_slice(self):
+        i = len(self.slices)
+        capacity = self.initial_capacity << i
+        rate = self.error / 2 ** (i + 1)
+        size = math.ceil(capacity * -math.log(rate) / math.log(2) ** 2)
+        self.slices.append([bytearray((size + 7) // 8), size, math.ceil(-math.log2(rate)), capacity, 0])
+
+    @staticmethod
+    def _hashes(value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+
+    def _contains(self, h1, h2):
+        for bits, size, hashes, _, _ in self.slices:
+            for j in range(hashes):
+                position = (h1 + j * h2) % size
+                if not bits[position >> 3] & (1 << (position & 7)):
+                    break
+            else:
+                return True
+        return False
+
+    def __contains__(self, value):
+        return self._contains(*self._hashes(value))
+
+    def add(self, value):
+        """Add value; True if it may have been added before."""
+        h1, h2 = self._hashes(value)
+        if self._contains(h1, h2):
+            return True
+        if not self.slices or self.slices[-1][4] >= self.slices[-1][3]:
+            self._new_slice()
+        current = self.slices[-1]
+        bits, size, hashes, _, _ = current
+        for j in range(hashes):
+            position = (h1 + j * h2) % size
+            bits[position >> 3] |= 1 << (position & 7)
+        current[4] += 1
+        return False
+
+    def merge(self, other):
+        if (other.initial_capacity, other.error) != (self.initial_capacity, self.error):
+            raise ValueError("cannot merge Bloom filters with different parameters")
+        while len(self.slices) < len(other.slices):
+            self._new_slice()
+        for mine, theirs in zip(self.slices, other.slices):
+            merged = int.from_bytes(mine[0], "little") | int.from_bytes(theirs[0], "little")
+            mine[0] = bytearray(merged.to_bytes(len(mine[0]), "little"))
+            mine[4] += theirs[4]
+        return self
+
+# Payload fields sampled into value sketches, and the gap to the previous line
+SAMPLED_FIELDS = ("amount", "commissionAmount", "availableBalance")
+LINE_GAP_METRIC = "line_gap_ms"
+FIELD_PATTERN = re.compile(
+    r'(?<!\w)"?(?P<field>amount|commissionAmount|availableBalance)"?\s*[=:]\s*"?(?P<value>\d+(?:\.\d+)?)'
+)
+
+def sampled_values(line):
+    """(field, value) of the first occurrence of each sampled field in a line."""
+    if "mount" not in line and "availableBalance" not in line:
+        return ()
+    values = {}
+    for match in FIELD_PATTERN.finditer(line):
+        values.setdefault(match.group("field"), float(match.group("value")))
+    return values.items()
+
+class AggregateStore:
+    """
+    Counts of classified lines, one row per (service, time bucket, type)
+    cell held in parallel array() columns. Buckets are integers, epoch
+    seconds // resolution; service names and (is_error, type) results are
+    interned to small integer codes, so counting a line is a couple of dict
+    lookups and an array increment. rollup() re-buckets the rows to a
+    coarser resolution without touching the logs, and rollups() derives
+    every summary the report and exporters need in a single pass.
+    Sampled values (payload amounts, line gaps) are kept as one
+    QuantileSketch per (service, bucket, metric) next to the counts, and
+    distinct IDs as one HyperLogLog per (service, bucket, field, outcome).
+    """
+
+    def __init__(self, resolution=DEFAULT_GRANULARITY):
+        self.resolution = resolution
+        self.bucket_us = resolution * 1000000
+        self.services = []
+        self.types = []  # (is_error, name)
+        self._service_codes = {}
+        self._type_codes = {}
+        self._rows = {}
+        self.service_col = array("i")
+        self.bucket_col = array("q")
+        self.type_col = array("i")
+        self.count_col = array("q")
+        # (service code, bucket, metric) -> QuantileSketch
+        self.sketches = {}
+        # SpaceSaving of group-by keys over the whole window, if queried
+        self.groups = None
+        # (service code, bucket, field, outcome) -> HyperLogLog
+        self.distinct = {}
+
+    @staticmethod
+    def _intern(value, values, codes):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    def service_code(self, service):
+        return self._intern(service, self.services, self._service_codes)
+
+    def type_code(self, result):
+        """Code of an (is_error, type) result as returned by detect_error_success."""
+        code = self._type_codes.get(result)
+        if code is None:
+            code = self._intern(result, self.types, self._type_codes)
+        return code
+
+    def add(self, service_code, bucket, type_code, count=1):
+        key = (service_code, bucket, type_code)
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = len(self.count_col)
+            self.service_col.append(service_code)
+            self.bucket_col.append(bucket)
+            self.type_col.append(type_code)
+            self.count_col.append(0)
+        self.count_col[row] += count
+
+    def add_sample(self, service_code, bucket, metric, value):
+        key = (service_code, bucket, metric)
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = QuantileSketch()
+        sketch.add(value)
+
+    def add_distinct(self, service_code, bucket, field, outcome, value):
+        key = (service_code, bucket, field, outcome)
+        sketch = self.distinct.get(key)
+        if sketch is None:
+            sketch = self.distinct[key] = HyperLogLog()
+        sketch.add(value)
+
+    def merge(self, other):
+        """
+        Add the counts of another store, re-mapping its interned codes. The
+        other store may be finer-grained as long as our resolution is a
+        multiple of its own.
+        """
+        if self.resolution % other.resolution:
+            raise ValueError(f"cannot merge {other.resolution}s buckets into {self.resolution}s buckets")
+        services = [self.service_code(service) for service in other.services]
+        types = [self.type_code(result) for result in other.types]
+        for s, b, t, count in zip(other.service_col, other.bucket_col, other.type_col, other.count_col):
+            self.add(services[s], b * other.resolution // self.resolution, types[t], count)
+        for (s, b, metric), sketch in other.sketches.items():
+            key = (services[s], b * other.resolution // self.resolution, metric)
+            if key not in self.sketches:
+                self.sketches[key] = QuantileSketch(sketch.relative_accuracy)
+            self.sketches[key].merge(sketch)
+        for (s, b, field, outcome), sketch in other.distinct.items():
+            key = (services[s], b * other.resolution // self.resolution, field, outcome)
+            if key not in self.distinct:
+                self.distinct[key] = HyperLogLog(sketch.precision)
+            self.distinct[key].merge(sketch)
+        if other.groups is not None:
+            if self.groups is None:
+                self.groups = SpaceSaving(other.groups.capacity)
+            self.groups.merge(other.groups)
+
+    def rollup(self, resolution):
+        """A new store with the same counts in coarser buckets."""
+        coarse = AggregateStore(resolution)
+        coarse.merge(self)
+        return coarse
+
+    def rows(self):
+        """(service, bucket label, is_error, type, count) tuples in insertion order."""
+        for s, b, t, count in zip(self.service_col, self.bucket_col, self.type_col, self.count_col):
+            is_error, type_name = self.types[t]
+            yield self.services[s], bucket_label(b, self.resolution), is_error, type_name, count
+
+    def rollups(self):
+        return Rollups(self)
+
+    def distributions(self):
+        """{service: {bucket: {metric: sketch}}} with names and buckets sorted."""
+        services = {}
+        for (s, b, metric), sketch in sorted(self.sketches.items(), key=lambda item: (
+                self.services[item[0][0]], item[0][1], item[0][2])):
+            services.setdefault(self.services[s], {}).setdefault(b, {})[metric] = sketch
+        return services
+
+    def distinct_counts(self):
+        """{service: {bucket: {field: {outcome: HyperLogLog}}}} with names and buckets sorted."""
+        services = {}
+        for (s, b, field, outcome), sketch in sorted(self.distinct.items(), key=lambda item: (
+                self.services[item[0][0]], item[0][1], DISTINCT_FIELDS.index(item[0][2]), item[0][3])):
+            services.setdefault(self.services[s], {}).setdefault(b, {}).setdefault(field, {})[outcome] = sketch
+        return services
+
+class Rollups:
+    """
+    Per-(service, bucket), per-service and overall totals and type counts,
+    all accumulated in one pass over an AggregateStore. Totals are
+    [success, error] pairs indexed by is_error; type counts are keyed by
+    type code.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.cells = {}          # (service, bucket) -> [success, error]
+        self.cell_types = {}     # (service, bucket) -> {type: count}
+        self.service_totals = {}
+        self.service_types = {}
+        self.type_totals = {}
+        self.totals = [0, 0]
+
+        types = store.types
+        for s, h, t, count in zip(store.service_col, store.bucket_col, store.type_col, store.count_col):
+            kind = 1 if types[t][0] else 0
+            cell = self.cells.get((s, h))
+            if cell is None:
+                cell = self.cells[(s, h)] = [0, 0]
+                self.cell_types[(s, h)] = {}
+                if s not in self.service_totals:
+                    self.service_totals[s] = [0, 0]
+                    self.service_types[s] = {}
+            cell[kind] += count
+            self.cell_types[(s, h)][t] = self.cell_types[(s, h)].get(t, 0) + count
+            self.service_totals[s][kind] += count
+            self.service_types[s][t] = self.service_types[s].get(t, 0) + count
+            self.type_totals[t] = self.type_totals.get(t, 0) + count
+            self.totals[kind] += count
+
+    def service_names(self):
+        """(name, code) of every service with counts, sorted by name."""
+        return sorted((self.store.services[s], s) for s in self.service_totals)
+
+    def service_buckets(self, s):
+        """(label, bucket) of every bucket of service s with counts, in order."""
+        resolution = self.store.resolution
+        return [(bucket_label(b, resolution), b) for b in sorted(b for (cs, b) in self.cells if cs == s)]
+
+    def named_types(self, counts, is_error):
+        """Sorted (type name, count) pairs of one kind from a {type: count} dict."""
+        types = self.store.types
+        return sorted((types[t][1], count) for t, count in counts.items() if types[t][0] == is_error)
+
+def query_accepts(query, is_error, result_type):
+    """Whether a classified (is_error, type) line is counted by the query."""
+    if is_error:
+        return query.log_choice in ["2", "3"] and (
+            not query.specific_error or query.specific_error in result_type.lower())
+    return query.log_choice in ["1", "3"] and (
+        not query.specific_success or query.specific_success in result_type.lower())
+
+def _window_timestamp_before(path, offset, start_us, end_us):
+    """Timestamp of the last line before offset if it is inside the window."""
+    with open(path, "rb") as f:
+        f.seek(max(0, offset - TAIL_PROBE_BYTES))
+        lines = f.read(min(offset, TAIL_PROBE_BYTES)).split(b"\n")
+    for raw in reversed(lines[1:] if offset > TAIL_PROBE_BYTES else lines):
+        ts = parse_epoch_us(_decode(raw))
+        if ts is not None:
+            return ts if start_us <= ts <= end_us else None
+    return None
+
+RESPONSE_MESSAGE_PATTERN = re.compile(r"""responseMessage['"]?\s*[=:]\s*['"]?(?P<message>[^'",})\\]*)""")
+
+def response_message_of(message):
+    if "responseMessage" not in message:
+        return "-"
+    match = RESPONSE_MESSAGE_PATTERN.search(message)
+    return match.group("message").strip() if match else "-"
+
+# How each --group-by field is read from (service, ParsedLine, result type)
+GROUP_FIELDS = {
+    "service": lambda service, record, result_type: service,
+    "level": lambda service, record, result_type: record.level,
+    "class": lambda service, record, result_type: record.logger or "-",
+    "thread": lambda service, record, result_type: record.thread or "-",
+    "responseMessage": lambda service, record, result_type: response_message_of(record.message),
+    "type": lambda service, record, result_type: result_type,
+}
+
+def parse_group_by(text):
+    """Field tuple of a --group-by list such as 'service,class'."""
+    fields = tuple(field.strip() for field in text.split(",") if field.strip())
+    unknown = [field for field in fields if field not in GROUP_FIELDS]
+    if not fields or unknown:
+        raise ValueError(f"invalid --group-by {text!r}, expected a comma list of {', '.join(GROUP_FIELDS)}")
+    return fields
+
+def count_group(query, store, service, ts, line, result_type):
+    """Add a counted line to the store's heavy hitters under its group-by key."""
+    if store.groups is None:
+        store.groups = SpaceSaving(max(MIN_TOP_CAPACITY, query.top * TOP_CAPACITY_FACTOR))
+    record = parse_line(line, ts)
+    store.groups.add(tuple(GROUP_FIELDS[field](service, record, result_type) for field in query.group_by))
+
+def scan_window(path, start_us, end_us, query, store, service, begin=None, end=None):
+    # The mmap engine skips lines no rule matches and never decodes the
+    # rest; sampling and grouping need them
+    if (query.engine == "mmap" and not query.distributions and not query.group_by
+            and compression_of(path) is None):
+        scan_window_mmap(path, start_us, end_us, query, store, service, begin=begin, end=end)
+        return
+    service_code = store.service_code(service)
+    accepted = {}
+    sample = query.distributions
+    # A byte range that starts inside the window continues from the line before it
+    previous_us = None
+    if sample and begin:
+        previous_us = _window_timestamp_before(path, begin, start_us, end_us)
+    for ts, line in iter_window_lines(path, start_us, end_us, begin=begin, end=end):
+        if sample:
+            bucket = ts // store.bucket_us
+            if previous_us is not None:
+                store.add_sample(service_code, bucket, LINE_GAP_METRIC, max(0, ts - previous_us) / 1000)
+            previous_us = ts
+            for field, value in sampled_values(line):
+                store.add_sample(service_code, bucket, field, value)
+        result = detect_error_success(line)
+        if result[0] is None:
+            continue  # Skip if neither success nor error
+        keep = accepted.get(result)
+        if keep is None:
+            keep = accepted[result] = query_accepts(query, *result)
+        if keep:
+            store.add(service_code, ts // store.bucket_us, store.type_code(result))
+            if query.group_by:
+                count_group(query, store, service, ts, line, result[1])
+
+_byte_second_cache = {}
+
+def parse_epoch_us_bytes(line):
+    """parse_epoch_us() for an ASCII-only bytes line."""
+    prefix = line[:19]
+    seconds = _byte_second_cache.get(prefix)
+    if seconds is None:
+        seconds = _parse_second(prefix.decode("ascii"))
+        if seconds is not None:
+            if len(_byte_second_cache) >= SECOND_CACHE_SIZE:
+                _byte_second_cache.clear()
+            _byte_second_cache[prefix] = seconds
+
+    millis = line[19:23]
+    if seconds is not None and len(millis) == 4 and millis[:1] == b"," and millis[1:].isdigit():
+        return seconds * 1000000 + int(millis[1:]) * 1000
+    return parse_epoch_us(line.decode("ascii"))
+
+def scan_window_mmap(path, start_us, end_us, query, store, service, begin=None, end=None,
+                     tolerance_s=ORDER_TOLERANCE_SECONDS):
+    """
+    scan_window() on a memory-mapped plain log. The window range is taken
+    from the mapping in line-aligned chunks and only the lines the buffer
+    classifier picks out of a chunk are parsed; lines with non-ASCII
+    content are decoded and go through the text path. The range ends where
+    the window locator puts the last in-window line, which gives the text
+    path's result for logs ordered within the tolerance.
+    """
+    service_code = store.service_code(service)
+    accepted = {}
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        if begin is None or end is None:
+            begin, end = window_byte_range(f, size, start_us, end_us, tolerance_s)
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            pos = begin
+            while pos < end:
+                cut = buf.rfind(b"\n", pos, min(pos + MMAP_CHUNK_BYTES, end)) + 1
+                if cut <= pos:
+                    # A single line longer than a chunk
+                    newline = buf.find(b"\n", pos, end)
+                    cut = end if newline < 0 else newline + 1
+                chunk = buf[pos:cut]
+                pos = cut
+
+                for line_start, mask in BUFFER_CLASSIFIER.candidate_lines(chunk):
+                    newline = chunk.find(b"\n", line_start)
+                    raw = chunk[line_start:] if newline < 0 else chunk[line_start:newline + 1]
+                    if needs_text_path(raw):
+                        line = _decode(raw)
+                        ts = parse_epoch_us(line)
+                    else:
+                        line = None
+                        ts = parse_epoch_us_bytes(raw)
+
+                    if ts is None or not start_us <= ts <= end_us:
+                        continue
+                    if line is None:
+                        result = BUFFER_CLASSIFIER.classify_bytes(raw, mask)
+                    else:
+                        result = detect_error_success(line)
+                    if result[0] is None:
+                        continue
+                    keep = accepted.get(result)
+                    if keep is None:
+                        keep = accepted[result] = query_accepts(query, *result)
+                    if keep:
+                        store.add(service_code, ts // store.bucket_us, store.type_code(result))
+
+def analyze_segment(task):
+    """
+    Count one byte range of one service log into a fresh AggregateStore.
+    Returns the store, which pickles cleanly back from a worker process.
+    """
+    path, service, begin, end, query = task
+    store = AggregateStore(query.resolution)
+    scan_window(path, query.start_us, query.end_us, query, store, service, begin=begin, end=end)
+    return store
+
+INDEX_VERSION = 4
+# Finest granularity kept in the index; any multiple of it can be answered
+# by rolling buckets up instead of re-parsing the log.
+INDEX_RESOLUTION = 10
+INDEX_BUCKET_US = INDEX_RESOLUTION * 1000000
+
+def rules_signature():
+    """Changes whenever the classification rules change, invalidating indexes."""
+    return repr((list(ERROR_PATTERNS.items()), list(SUCCESS_PATTERNS.items())))
+
+def index_dir(log_dir):
+    """Where the checkpoints of the logs in log_dir are kept."""
+    return os.path.join(log_dir, ".index")
+
+class FileIndex:
+    """
+    Persistent checkpoint of one log file: its inode, the byte offset already
+    consumed and per-10-second success/error counts by type. update() only reads
+    bytes appended since the last run; a new inode, a file smaller than the
+    offset or changed rules mean rotation/truncation and trigger a rebuild.
+    """
+
+    def __init__(self, path, checkpoint_dir):
+        self.path = path
+        self.index_path = os.path.join(checkpoint_dir, os.path.basename(path) + ".json")
+        self.reset(None)
+
+    def reset(self, inode):
+        self.inode = inode
+        self.size = 0
+        self.offset = 0
+        # bucket -> [success_types, error_types]
+        self.buckets = {}
+
+    def load(self):
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if data.get("version") != INDEX_VERSION or data.get("rules") != rules_signature():
+            return self
+        self.inode = data["inode"]
+        self.size = data["size"]
+        self.offset = data["offset"]
+        self.buckets = {int(bucket): counts for bucket, counts in data["buckets"].items()}
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "rules": rules_signature(),
+                "inode": self.inode,
+                "size": self.size,
+                "offset": self.offset,
+                "buckets": self.buckets,
+            }, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+
+    def update(self):
+        """
+        Index complete lines appended since the checkpoint. Returns bytes read.
+        A plain file's last line without a newline may still be being written,
+        so the offset stays before it and query() reads it from the log;
+        compressed segments never change and are indexed to their end.
+        """
+        st = os.stat(self.path)
+        compressed = compression_of(self.path) is not None
+        # Offsets of compressed segments count decompressed bytes, so any
+        # size change there means the segment was replaced
+        if (st.st_ino != self.inode or st.st_size < self.offset and not compressed
+                or compressed and st.st_size != self.size):
+            self.reset(st.st_ino)
+        if compressed and self.size == st.st_size:
+            return 0
+        resized = self.size != st.st_size
+        self.size = st.st_size
+
+        start_offset = self.offset
+        with open_log(self.path) as f:
+            f.seek(self.offset)
+            for raw in f:
+                if not raw.endswith(b"\n") and not compressed:
+                    break
+                self.offset += len(raw)
+                line = _decode(raw)
+                ts = parse_epoch_us(line)
+                if ts is None:
+                    continue
+                is_error, result_type = detect_error_success(line)
+                if is_error is None:
+                    continue
+                counts = self.buckets.setdefault(ts // INDEX_BUCKET_US, [{}, {}])[1 if is_error else 0]
+                counts[result_type] = counts.get(result_type, 0) + 1
+
+        if resized or self.offset != start_offset:
+            self.save()
+        return self.offset - start_offset
+
+    def query(self, query, store, service):
+        """
+        Answer a window query into store: whole index buckets are rolled up
+        into the store's resolution, the partial buckets at either edge are
+        read from the log itself.
+        """
+        if store.resolution % INDEX_RESOLUTION:
+            raise ValueError(f"index buckets are {INDEX_RESOLUTION}s, cannot answer {store.resolution}s")
+        first = -(-query.start_us // INDEX_BUCKET_US)
+        end = (query.end_us + 1) // INDEX_BUCKET_US  # exclusive
+
+        if first >= end:
+            scan_window(self.path, query.start_us, query.end_us, query, store, service)
+            return store
+
+        service_code = store.service_code(service)
+        factor = store.resolution // INDEX_RESOLUTION
+        for bucket, (success_types, error_types) in self.buckets.items():
+            if first <= bucket < end:
+                for is_error, types in ((False, success_types), (True, error_types)):
+                    for result_type, count in types.items():
+                        if query_accepts(query, is_error, result_type):
+                            store.add(service_code, bucket // factor,
+                                      store.type_code((is_error, result_type)), count)
+
+        # Bytes past the offset are not in the buckets yet
+        if compression_of(self.path) is None:
+            size = os.path.getsize(self.path)
+            if size > self.offset:
+                scan_window(self.path, first * INDEX_BUCKET_US, end * INDEX_BUCKET_US - 1, query, store,
+                            service, begin=self.offset, end=size)
+
+        if query.start_us < first * INDEX_BUCKET_US:
+            scan_window(self.path, query.start_us, first * INDEX_BUCKET_US - 1, query, store, service)
+        if end * INDEX_BUCKET_US <= query.end_us:
+            scan_window(self.path, end * INDEX_BUCKET_US, query.end_us, query, store, service)
+        return store
+
+def prune_checkpoints(log_dir):
+    """Remove the checkpoints of logs that are gone, e.g. rotated past the last backup."""
+    directory = index_dir(log_dir)
+    if not os.path.isdir(directory):
+        return
+    for file in os.listdir(directory):
+        if file.endswith(".json") and not os.path.exists(os.path.join(log_dir, file[:-len(".json")])):
+            os.remove(os.path.join(directory, file))
+
+def analyze_indexed(task):
+    """Bring the checkpoint of one service log up to date and query it."""
+    path, service, query, checkpoint_dir = task
+    index = FileIndex(path, checkpoint_dir).load()
+    index.update()
+    return index.query(query, AggregateStore(query.resolution), service)
+
+# ---------- structured fields ----------
+class ParsedLine:
+    """
+    Header fields of one log line,
+    ts LEVEL [logger] (thread) [exchangeId : '...' -] message
+    split with fixed positions and str.partition. Fields missing from a
+    line are None and message is whatever follows the last header field.
+    """
+
+    __slots__ = ("ts", "level", "logger", "thread", "exchange", "message", "line", "_result")
+
+    def __init__(self, ts, level, logger, thread, exchange, message, line):
+        self.ts = ts
+        self.level = level
+        self.logger = logger
+        self.thread = thread
+        self.exchange = exchange
+        self.message = message
+        self.line = line
+        self._result = None
+
+    def result(self):
+        """detect_error_success() of the whole line, computed once."""
+        if self._result is None:
+            self._result = detect_error_success(self.line)
+        return self._result
+
+def parse_line(line, ts=None):
+    """ParsedLine of a log line, or None without a timestamp."""
+    if ts is None:
+        ts = parse_epoch_us(line)
+        if ts is None:
+            return None
+    # "YYYY-MM-DD HH:MM:SS,mmm " or, without milliseconds, "YYYY-MM-DD HH:MM:SS "
+    rest = line[24:] if line[23:24] == " " else line[20:]
+    level, _, rest = rest.rstrip("\n").partition(" ")
+    rest = rest.lstrip(" ")
+    logger = thread = exchange = None
+
+    if not rest.startswith("["):
+        # Trace fields (traceId=..., sampled=...) can sit before the logger
+        close = rest.find("] (")
+        if close >= 0:
+            start = rest.rfind(" [", 0, close)
+            if start >= 0:
+                rest = rest[start + 1:]
+    if rest.startswith("["):
+        logger, sep, tail = rest[1:].partition("] ")
+        if sep:
+            rest = tail
+        else:
+            logger = None
+    if rest.startswith("("):
+        thread, sep, tail = rest[1:].partition(") ")
+        if sep:
+            rest = tail
+        else:
+            thread = None
+    if rest.startswith("exchangeId : '"):
+        exchange, sep, tail = rest[14:].partition("' - ")
+        if sep:
+            rest = tail
+        else:
+            exchange = None
+    return ParsedLine(ts, level, logger, thread, exchange, rest, line)
+
+# ---------- transaction correlation ----------
+EXCHANGE_TTL_SECONDS = 60
+MAX_OPEN_EXCHANGES = 100000
+TRANSACTION_QUANTILES = (0.5, 0.95, 0.99)
+# Upper bounds (ms) of the operation step latency histogram
+STEP_HISTOGRAM_MS = (1, 10, 100, 1000, 10000)
+# Operation of exchanges that never name one
+NO_OPERATION = "-"
+
+EXCHANGE_PATTERN = re.compile(r"""exchangeId(?: : '|"\s*:\s*")(?P<id>[^'"]+)""")
+OPERATION_PATTERN = re.compile(
+    r"Performing Operation - '(?P<start>\w+)'|Operation Request '(?P<result>\w+)'"
+    r"|'(?P<response>\w+)' Response =>|Operation (?P<failed>\w+) failed"
+)
+
+def exchange_of(record):
+    """exchangeId of a ParsedLine, from its header tag or else a JSON field."""
+    if record.exchange is not None:
+        return record.exchange
+    if "exchangeId" not in record.message:
+        return None
+    match = EXCHANGE_PATTERN.search(record.message)
+    return match.group("id") if match else None
+
+def operation_of(line):
+    """(operation a line reports on or None, whether the line starts it)."""
+    if "Operation" not in line and "Response =>" not in line:
+        return None, False
+    match = OPERATION_PATTERN.search(line)
+    if match is None:
+        return None, False
+    return match.group(match.lastgroup), match.lastgroup == "start"
+
+class TransactionStats:
+    """
+    One outcome per correlated exchange and the sketch of their first to
+    last line durations (ms), kept per (service, operation). Operation steps
+    inside the exchanges are kept per (service, operation) as well.
+    """
+
+    # unclassified: ran its course without a line the rules classify;
+    # incomplete: cut off without one, by the window end, an early end or a
+    # step that never finished
+    OUTCOMES = ("success", "error", "unclassified", "incomplete")
+
+    def __init__(self):
+        # (service, operation) -> [outcome counts, error type counts, QuantileSketch]
+        self.groups = {}
+        # (service, operation) -> [failed steps, unfinished steps, QuantileSketch]
+        self.steps = {}
+
+    def _group(self, service, operation):
+        group = self.groups.get((service, operation))
+        if group is None:
+            group = self.groups[(service, operation)] = [dict.fromkeys(self.OUTCOMES, 0), {}, QuantileSketch()]
+        return group
+
+    def add(self, service, operation, outcome, error_type, duration_ms):
+        outcomes, error_types, sketch = self._group(service, operation)
+        outcomes[outcome] += 1
+        if error_type is not None:
+            error_types[error_type] = error_types.get(error_type, 0) + 1
+        sketch.add(duration_ms)
+
+    def _step(self, service, operation):
+        step = self.steps.get((service, operation))
+        if step is None:
+            step = self.steps[(service, operation)] = [0, 0, QuantileSketch()]
+        return step
+
+    def add_step(self, service, operation, duration_ms, failed):
+        """Record one operation step; a duration of None means it never ended."""
+        step = self._step(service, operation)
+        if failed:
+            step[0] += 1
+        if duration_ms is None:
+            step[1] += 1
+        else:
+            step[2].add(duration_ms)
+
+    def merge(self, other):
+        for key, (outcomes, error_types, sketch) in other.groups.items():
+            group = self._group(*key)
+            for outcome, count in outcomes.items():
+                group[0][outcome] += count
+            for error_type, count in error_types.items():
+                group[1][error_type] = group[1].get(error_type, 0) + count
+            group[2].merge(sketch)
+        for key, (failed, unfinished, sketch) in other.steps.items():
+            step = self._step(*key)
+            step[0] += failed
+            step[1] += unfinished
+            step[2].merge(sketch)
+        return self
+
+    def step_services(self):
+        """{service: [(operation, failed, unfinished, sketch), ...]} sorted by name."""
+        services = {}
+        for (service, operation), step in sorted(self.steps.items()):
+            services.setdefault(service, []).append((operation, *step))
+        return services
+
+    def services(self):
+        """{service: [(operation, outcomes, error_types, sketch), ...]} sorted by name."""
+        services = {}
+        for (service, operation), group in sorted(self.groups.items()):
+            services.setdefault(service, []).append((operation, *group))
+        return services
+
+    def service_total(self, rows):
+        """(outcomes, error_types, sketch) over all operations of one service's rows."""
+        outcomes = dict.fromkeys(self.OUTCOMES, 0)
+        error_types = {}
+        sketch = QuantileSketch()
+        for _, row_outcomes, row_error_types, row_sketch in rows:
+            for outcome, count in row_outcomes.items():
+                outcomes[outcome] += count
+            for error_type, count in row_error_types.items():
+                error_types[error_type] = error_types.get(error_type, 0) + count
+            sketch.merge(row_sketch)
+        return outcomes, error_types, sketch
+
+# Payload IDs counted by --distinct, and how an ID field appears in a message
+DISTINCT_FIELDS = ("userId", "accountNumber", "referenceNo", "txnReferenceNo")
+DISTINCT_PATTERN = re.compile(r"""\b(?P<field>userId|accountNumber|referenceNo|txnReferenceNo)['"]?\s*[=:]\s*"""
+                              r"""['"]?(?P<value>[\w-]+)""")
+
+def distinct_ids(message):
+    """(field, value) of the ID fields named in a message, without duplicates."""
+    if "Id" not in message and "Number" not in message and "eferenceNo" not in message:
+        return ()
+    return {(match.group("field"), match.group("value")) for match in DISTINCT_PATTERN.finditer(message)}
+
+def _outcome(is_error):
+    return "error" if is_error else "success"
+
+class TransactionCorrelator:
+    """
+    Streams the lines of one service into exchanges keyed by exchangeId.
+    An exchange ends when it has been idle for ttl_us, or when the lines run
+    out; if more than max_open exchanges are in flight the least recently
+    seen one is ended early, so state stays bounded. An ended exchange
+    counts once: as an error if any of its lines was one (its first error
+    type), as a success if any line was. Otherwise it is incomplete when it
+    was cut off (still open when the lines ran out, ended early, or idle in
+    a step that never finished) and unclassified when it was not. Its
+    operation is the last one its lines named.
+
+    Operations of an exchange run one after another. A step starts at its
+    "Performing Operation" line, or without one where the previous step
+    ended (the exchange's first line for the first step). It ends at its
+    last result/response line, or else where the next operation starts; it
+    failed if an error line came while it was running.
+
+    With a distinct store the IDs (DISTINCT_FIELDS) named by the lines of an
+    exchange are added to its HyperLogLogs under the exchange's outcome and
+    the bucket of its first line; IDs on lines without an exchangeId count
+    under the outcome of that line, or as uncorrelated if it has none.
+    """
+
+    def __init__(self, service, stats, ttl_us=EXCHANGE_TTL_SECONDS * 1000000,
+                 max_open=MAX_OPEN_EXCHANGES, distinct=None):
+        self.service = service
+        self.stats = stats
+        self.ttl_us = ttl_us
+        self.max_open = max_open
+        self.distinct = distinct
+        self.service_code = distinct.service_code(service) if distinct is not None else None
+        # exchangeId -> [first_us, last_us, operation, is_error, result_type, step, ids],
+        # kept in least recently seen order; step is the running
+        # [operation, start_us, end_us, failed] or None, ids the set of
+        # (field, value) seen so far
+        self.open = {}
+
+    def add(self, record):
+        ts = record.ts
+        # Exchanges idle for longer than the TTL are over
+        open_exchanges = self.open
+        while open_exchanges:
+            oldest = next(iter(open_exchanges))
+            if ts - open_exchanges[oldest][1] <= self.ttl_us:
+                break
+            self._finish(open_exchanges.pop(oldest))
+
+        exchange = exchange_of(record)
+        ids = distinct_ids(record.message) if self.distinct is not None else ()
+        if exchange is None:
+            if ids:
+                is_error = record.result()[0]
+                self._count_ids(ids, ts, "uncorrelated" if is_error is None else _outcome(is_error))
+            return
+        state = open_exchanges.pop(exchange, None)
+        if state is None:
+            state = [ts, ts, None, None, None, None, set()]
+            if len(open_exchanges) >= self.max_open:
+                self._finish(open_exchanges.pop(next(iter(open_exchanges))), cut_off=True)
+        open_exchanges[exchange] = state
+
+        if ts < state[0]:
+            state[0] = ts
+        if ts > state[1]:
+            state[1] = ts
+        if ids:
+            state[6].update(ids)
+        operation, starts = operation_of(record.message)
+        step = state[5]
+        if operation is not None:
+            state[2] = operation
+            if step is None or starts or step[0] != operation:
+                start_us = ts
+                if not starts:
+                    # No start line: it began where the previous step or the exchange did
+                    if step is None:
+                        start_us = state[0]
+                    elif step[2] is not None:
+                        start_us = step[2]
+                if step is not None:
+                    self._finish_step(step, ts)
+                step = state[5] = [operation, start_us, None, False]
+            if not starts:
+                step[2] = ts
+
+        is_error, result_type = record.result()
+        if is_error is not None and state[3] is not True and (is_error or state[3] is None):
+            state[3] = is_error
+            state[4] = result_type
+        if is_error and step is not None:
+            step[3] = True
+
+    def close(self):
+        """End every exchange still open."""
+        for state in self.open.values():
+            self._finish(state, cut_off=True)
+        self.open.clear()
+        return self.stats
+
+    def _finish_step(self, step, next_start_us=None):
+        operation, start_us, end_us, failed = step
+        if end_us is None:
+            end_us = next_start_us
+        duration_ms = None if end_us is None else (end_us - start_us) / 1000
+        self.stats.add_step(self.service, operation, duration_ms, failed)
+
+    def _count_ids(self, ids, ts, outcome):
+        bucket = ts // self.distinct.bucket_us
+        for field, value in ids:
+            self.distinct.add_distinct(self.service_code, bucket, field, outcome, value)
+
+    def _finish(self, state, cut_off=False):
+        first_us, last_us, operation, is_error, result_type, step, ids = state
+        if step is not None:
+            self._finish_step(step)
+        if is_error is not None:
+            outcome = _outcome(is_error)
+        elif cut_off or step is not None and step[2] is None:
+            outcome = "incomplete"
+        else:
+            outcome = "unclassified"
+        if ids:
+            self._count_ids(ids, first_us, outcome)
+        self.stats.add(self.service, operation or NO_OPERATION, outcome,
+                       result_type if is_error else None, (last_us - first_us) / 1000)
+
+# ---------- template mining ----------
+TEMPLATE_DEPTH = 4
+TEMPLATE_SIMILARITY = 0.5
+TEMPLATE_MAX_CHILDREN = 100
+MAX_TEMPLATES = 1000
+TEMPLATE_REPORT_LIMIT = 15
+WILDCARD = "<*>"
+# Levels whose lines are mined in "errors" mode even when no rule matches them
+ERROR_LEVELS = ("WARN", "WARNING", "ERROR", "SEVERE", "FATAL")
+
+# Variable parts of a message, replaced before clustering; order matters
+TEMPLATE_MASKS = [
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<UUID>"),
+    (re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?|\d{2}/\w{3}/\d{4}:\d{2}:\d{2}:\d{2}"), "<TS>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}\b"), "<IP>"),
+    (re.compile(r"\b(?=[0-9a-f]*\d)[0-9a-f]{16,}\b"), "<HEX>"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "<NUM>"),
+]
+
+def mask_message(message):
+    for pattern, token in TEMPLATE_MASKS:
+        message = pattern.sub(token, message)
+    return message
+
+class TemplateMiner:
+    """
+    Online log template mining in the style of Drain. Masked messages are
+    routed through a fixed-depth prefix tree, by token count and then by
+    their first tokens, to a short list of templates; the message joins the
+    most similar one (share of equal tokens >= similarity), whose differing
+    tokens become <*>, or starts a new template. Per-line work is a few
+    dict lookups plus comparing against the templates of one leaf. Past
+    max_templates, lines that would start a new template are only counted.
+    """
+
+    def __init__(self, depth=TEMPLATE_DEPTH, similarity=TEMPLATE_SIMILARITY,
+                 max_children=TEMPLATE_MAX_CHILDREN, max_templates=MAX_TEMPLATES):
+        self.depth = depth
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_templates = max_templates
+        self.root = {}
+        # [tokens, count] per template, in discovery order
+        self.templates = []
+        self.overflow = 0
+
+    def _leaf(self, tokens):
+        node = self.root.setdefault(len(tokens), {})
+        for token in tokens[:self.depth - 2]:
+            if any(c.isdigit() for c in token) or token.startswith("<"):
+                token = WILDCARD
+            child = node.get(token)
+            if child is None:
+                if len(node) >= self.max_children:
+                    token = WILDCARD
+                    child = node.get(token)
+                if child is None:
+                    child = node[token] = {}
+            node = child
+        return node.setdefault(None, [])
+
+    def add(self, message, count=1):
+        tokens = mask_message(message).split()
+        leaf = self._leaf(tokens)
+        best, best_score = None, -1.0
+        for template in leaf:
+            same = sum(1 for a, b in zip(template[0], tokens) if a == b)
+            score = same / len(tokens) if tokens else 1.0
+            if score > best_score:
+                best, best_score = template, score
+
+        if best is not None and best_score >= self.similarity:
+            template_tokens = best[0]
+            for i, (a, b) in enumerate(zip(template_tokens, tokens)):
+                if a != b:
+                    template_tokens[i] = WILDCARD
+            best[1] += count
+        elif len(self.templates) < self.max_templates:
+            template = [tokens, count]
+            leaf.append(template)
+            self.templates.append(template)
+        else:
+            self.overflow += count
+
+    def counts(self):
+        """(template text, count) pairs, most frequent first."""
+        return sorted(((" ".join(tokens), count) for tokens, count in self.templates),
+                      key=lambda item: (-item[1], item[0]))
+
+def mines_line(mode, record):
+    """Whether a ParsedLine is mined in mode "errors" or "all"."""
+    if mode == "all" or record.level in ERROR_LEVELS:
+        return True
+    return record.result()[0] is True
+
+StreamStages = namedtuple("StreamStages", "transactions exchange_ttl templates distinct")
+
+def stream_service(task):
+    """
+    Run the per-service streaming stages over the window lines of all
+    segments of one service, oldest first. Returns (TransactionStats or
+    None, TemplateMiner or None, AggregateStore with distinct counts or None).
+    """
+    service, paths, query, stages = task
+    correlator = None
+    distinct = AggregateStore(query.resolution) if stages.distinct else None
+    if stages.transactions or stages.distinct:
+        correlator = TransactionCorrelator(service, TransactionStats(), stages.exchange_ttl * 1000000,
+                                           distinct=distinct)
+    miner = TemplateMiner() if stages.templates else None
+    for path in paths:
+        for ts, line in iter_window_lines(path, query.start_us, query.end_us):
+            record = parse_line(line, ts)
+            if correlator is not None:
+                correlator.add(record)
+            if miner is not None and mines_line(stages.templates, record):
+                miner.add(record.message.strip())
+    stats = correlator.close() if correlator is not None else None
+    return stats if stages.transactions else None, miner, distinct
+
+# ---------- repeated references ----------
+REFERENCE_FIELDS = ("referenceNo", "txnReferenceNo")
+# (exchangeId, reference) pairs remembered to count a reference once per exchange
+RECENT_REFERENCE_PAIRS = 100000
+REPEAT_REPORT_LIMIT = 20
+
+RepeatedReference = namedtuple("RepeatedReference", "reference exchanges services first_us last_us")
+
+def iter_references(paths, query):
+    """(ts, exchangeId, reference) of the window lines of paths that carry an exchangeId."""
+    for path in paths:
+        for ts, line in iter_window_lines(path, query.start_us, query.end_us):
+            if "eferenceNo" not in line:
+                continue
+            record = parse_line(line, ts)
+            exchange = exchange_of(record)
+            # Lines logged before the exchange is set up would look like a second use
+            if exchange is None:
+                continue
+            for field, value in distinct_ids(record.message):
+                if field in REFERENCE_FIELDS:
+                    yield ts, exchange, value
+
+def reference_candidates(task):
+    """
+    First pass over one service: a ScalableBloomFilter of its references
+    and the set of those that may have come up in an earlier exchange too.
+    """
+    service, paths, query = task
+    seen = ScalableBloomFilter()
+    candidates = set()
+    recent = {}
+    for _, exchange, reference in iter_references(paths, query):
+        pair = (exchange, reference)
+        if pair in recent:
+            continue
+        recent[pair] = None
+        if len(recent) > RECENT_REFERENCE_PAIRS:
+            del recent[next(iter(recent))]
+        if seen.add(reference):
+            candidates.add(reference)
+    return seen, candidates
+
+def confirm_references(task):
+    """
+    Second pass over one service: the exact exchanges, first and last time
+    of every reference that is a candidate or in the other services' filter.
+    """
+    service, paths, query, candidates, others = task
+    occurrences = {}
+    for ts, exchange, reference in iter_references(paths, query):
+        entry = occurrences.get(reference)
+        if entry is None:
+            if reference not in candidates and reference not in others:
+                continue
+            entry = occurrences[reference] = [set(), ts, ts]
+        entry[0].add(exchange)
+        entry[1] = min(entry[1], ts)
+        entry[2] = max(entry[2], ts)
+    return occurrences
+
+def find_repeated_references(tasks, run=map):
+    """
+    References (referenceNo / txnReferenceNo values) used by more than one
+    exchange in the window, within or across services, most exchanges
+    first. tasks are (service, paths, query) and run maps a pass over them,
+    e.g. a process pool's map. Bloom filters keep the first pass small; the
+    exact second pass only tracks the candidates they let through, so false
+    positives never reach the result.
+    """
+    filters = list(run(reference_candidates, tasks))
+    candidates = set().union(*(found for _, found in filters))
+    confirm_tasks = []
+    for i, (service, paths, query) in enumerate(tasks):
+        others = ScalableBloomFilter()
+        for j, (seen, _) in enumerate(filters):
+            if j != i:
+                others.merge(seen)
+        confirm_tasks.append((service, paths, query, candidates, others))
+
+    uses = {}
+    for (service, _, _), occurrences in zip(tasks, run(confirm_references, confirm_tasks)):
+        for reference, (exchanges, first_us, last_us) in occurrences.items():
+            entry = uses.setdefault(reference, [set(), first_us, last_us])
+            entry[0].update((service, exchange) for exchange in exchanges)
+            entry[1] = min(entry[1], first_us)
+            entry[2] = max(entry[2], last_us)
+    repeats = [
+        RepeatedReference(reference, len(exchanges), sorted({service for service, _ in exchanges}),
+                          first_us, last_us)
+        for reference, (exchanges, first_us, last_us) in uses.items()
+        if len(exchanges) > 1
+    ]
+    repeats.sort(key=lambda repeat: (-repeat.exchanges, repeat.first_us, repeat.reference))
+    return repeats
+
+# ---------- live follow mode ----------
+ROLLING_WINDOWS = (60, 300, 900)
+FOLLOW_INTERVAL = 2.0
+POLL_INTERVAL = 0.5
+MAX_PARTIAL_LINE = 1024 * 1024
+
+IN_MODIFY = 0x00000002
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+class RollingCounter:
+    """
+    Success/error counts over the last 1m/5m/15m in a ring of one-second
+    slots. Each window keeps a running total that is adjusted as seconds
+    enter and leave it, so adding a line is O(1) and memory is fixed.
+    """
+
+    def __init__(self, windows=ROLLING_WINDOWS):
+        self.windows = windows
+        self.span = max(windows)
+        self.slots = [[0, 0] for _ in range(self.span)]
+        self.totals = [[0, 0] for _ in windows]
+        self.now = None
+
+    def advance(self, second):
+        if self.now is None or second - self.now >= self.span:
+            for slot in self.slots:
+                slot[0] = slot[1] = 0
+            for total in self.totals:
+                total[0] = total[1] = 0
+            self.now = second
+            return
+        while self.now < second:
+            self.now += 1
+            for total, window in zip(self.totals, self.windows):
+                leaving = self.slots[(self.now - window) % self.span]
+                total[0] -= leaving[0]
+                total[1] -= leaving[1]
+            slot = self.slots[self.now % self.span]
+            slot[0] = slot[1] = 0
+
+    def add(self, second, is_error):
+        if self.now is None or second > self.now:
+            self.advance(second)
+        age = self.now - second
+        if age >= self.span:
+            return
+        self.slots[second % self.span][is_error] += 1
+        for total, window in zip(self.totals, self.windows):
+            if age < window:
+                total[is_error] += 1
+
+class TailedFile:
+    """Reads complete lines appended to one log, reopening on rotation/truncation."""
+
+    def __init__(self, path, service, from_us):
+        self.path = path
+        self.service = service
+        self.from_us = from_us
+        self.f = None
+        self.inode = None
+        self.partial = b""
+
+    def _open(self, st):
+        if self.f:
+            self.f.close()
+        self.f = open(self.path, "rb")
+        self.inode = st.st_ino
+        self.partial = b""
+        # Prime the rolling windows with the lines they still cover
+        self.f.seek(locate_window_start(self.f, self.from_us, st.st_size))
+
+    def read_lines(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        if self.f is None or st.st_ino != self.inode or st.st_size < self.f.tell():
+            self._open(st)
+
+        chunk = self.f.read()
+        if not chunk:
+            return
+        lines = (self.partial + chunk).split(b"\n")
+        self.partial = lines.pop()
+        if len(self.partial) > MAX_PARTIAL_LINE:
+            self.partial = b""
+        for raw in lines:
+            yield _decode(raw)
+
+def _open_inotify(directory):
+    """inotify descriptor watching directory, or None where unavailable."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), IN_MODIFY | IN_CREATE | IN_MOVED_TO) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+def _changed_names(fd, timeout):
+    """Wait up to timeout for inotify events and return the file names touched."""
+    ready, _, _ = select.select([fd], [], [], timeout)
+    names = set()
+    if not ready:
+        return names
+    try:
+        data = os.read(fd, 64 * 1024)
+    except BlockingIOError:
+        return names
+    offset = 0
+    while offset + INOTIFY_EVENT.size <= len(data):
+        _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+        offset += INOTIFY_EVENT.size
+        names.add(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+        offset += length
+    return names
+
+def draw_rolling(counters):
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    labels = [f"{w // 60}m ok/err" for w in ROLLING_WINDOWS]
+    out = ["\033[H\033[J" + f"LIVE LOG MONITOR  {now}  (CTRL+C to stop)", ""]
+    out.append(f"{'SERVICE':<28}" + "".join(f"{label:>18}" for label in labels) + f"{'15m err%':>10}")
+    out.append("-" * (28 + 18 * len(labels) + 10))
+    for service in sorted(counters):
+        totals = counters[service].totals
+        cells = "".join(f"{f'{ok}/{err}':>18}" for ok, err in totals)
+        ok, err = totals[-1]
+        rate = (err / (ok + err) * 100) if ok + err else 0.0
+        out.append(f"{service:<28}{cells}{rate:>9.2f}%")
+    print("\n".join(out), flush=True)
+
+def follow(interval=FOLLOW_INTERVAL, log_dir=LOG_DIR):
+    """Tail every file in log_dir and redraw rolling counts until interrupted."""
+    counters = {}
+    tails = {}
+    span_us = max(ROLLING_WINDOWS) * 1000000
+    fd = _open_inotify(log_dir)
+    next_draw = 0.0
+
+    def refresh(names=None):
+        now_s = to_epoch_us(datetime.now()) // 1000000
+        for file in sorted(os.listdir(log_dir)):
+            path = os.path.join(log_dir, file)
+            if file not in tails:
+                service, seq, compression = parse_segment_name(file)
+                if seq is not None or compression or not os.path.isfile(path):
+                    continue  # rotated segments are no longer written to
+                tails[file] = TailedFile(path, service, to_epoch_us(datetime.now()) - span_us)
+                counters.setdefault(service, RollingCounter())
+            elif names is not None and file not in names:
+                continue
+            tail = tails[file]
+            counter = counters[tail.service]
+            for line in tail.read_lines():
+                ts = parse_epoch_us(line)
+                if ts is None:
+                    continue
+                is_error, _ = detect_error_success(line)
+                if is_error is None:
+                    continue
+                counter.add(min(ts // 1000000, now_s), 1 if is_error else 0)
+
+    try:
+        refresh()
+        while True:
+            if time.monotonic() >= next_draw:
+                # Full pass on every redraw also catches rotations inotify missed
+                refresh()
+                now_s = to_epoch_us(datetime.now()) // 1000000
+                for counter in counters.values():
+                    counter.advance(now_s)
+                draw_rolling(counters)
+                next_draw = time.monotonic() + interval
+            wait = max(0.0, next_draw - time.monotonic())
+            if fd is not None:
+                refresh(_changed_names(fd, min(wait, interval)))
+            else:
+                time.sleep(min(wait, POLL_INTERVAL))
+                refresh()
+    except KeyboardInterrupt:
+        print("\nStopped following logs.")
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+LOG_TYPES = {"success": "1", "error": "2", "both": "3"}
+WINDOW_FORMAT = "%Y-%m-%d %H:%M"
+
+# Any of these on the command line switches off the interactive prompts
+QUERY_FLAGS = ("last", "start", "end", "type", "error_filter", "success_filter",
+               "success_details", "error_details")
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Analyze service logs in a time window. "
+                    "Without query options the analyzer asks interactively.")
+    window = parser.add_argument_group("time window")
+    window.add_argument("--last", type=float, metavar="HOURS",
+                        help="analyze the last N hours")
+    window.add_argument("--from", dest="start", metavar="'YYYY-MM-DD HH:MM'",
+                        help="start of a custom time range")
+    window.add_argument("--to", dest="end", metavar="'YYYY-MM-DD HH:MM'",
+                        help="end of a custom time range")
+
+    report = parser.add_argument_group("report")
+    report.add_argument("--type", choices=sorted(LOG_TYPES),
+                        help="log type to count (default: both)")
+    report.add_argument("--error-filter", metavar="TEXT",
+                        help="only count error types containing TEXT")
+    report.add_argument("--success-filter", metavar="TEXT",
+                        help="only count success types containing TEXT")
+    report.add_argument("--success-details", action="store_true",
+                        help="show success types breakdown")
+    report.add_argument("--error-details", action="store_true",
+                        help="show error types breakdown")
+    report.add_argument("--granularity", default="1h", metavar="N{s,m,h,d}",
+                        help="time bucket size of the report, e.g. 10s, 1m, 1h, 1d (default: 1h)")
+    report.add_argument("--distributions", action="store_true",
+                        help="also report amount and line-gap percentiles per service and bucket")
+    report.add_argument("--distinct", action="store_true",
+                        help=f"also estimate distinct {', '.join(DISTINCT_FIELDS)} values "
+                             "per service, bucket and transaction outcome; read from the logs "
+                             "even with --index, which keeps counts only")
+    report.add_argument("--group-by", metavar="FIELDS",
+                        help=f"count the lines by a comma list of {','.join(GROUP_FIELDS)}")
+    report.add_argument("--top", type=int, default=10, metavar="K",
+                        help="number of --group-by keys to report (default: 10)")
+    report.add_argument("--format", choices=["text"] + sorted(EXPORTERS), default="text",
+                        help="output format (default: text report); csv holds the line counts only")
+
+    parser.add_argument("--log-dir", default=LOG_DIR,
+                        help=f"directory of the service logs (default: {LOG_DIR})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (default: 1)")
+    parser.add_argument("--engine", choices=["text", "mmap"], default="text",
+                        help="scan plain logs as decoded lines or as memory-mapped bytes (default: text)")
+    parser.add_argument("--transactions", action="store_true",
+                        help="correlate lines by exchangeId and report one outcome and "
+                             "p50/p95/p99 duration per transaction")
+    parser.add_argument("--exchange-ttl", type=float, default=EXCHANGE_TTL_SECONDS, metavar="SECONDS",
+                        help=f"idle time after which an exchange counts as ended (default: {EXCHANGE_TTL_SECONDS})")
+    parser.add_argument("--duplicates", action="store_true",
+                        help="find referenceNo/txnReferenceNo values used by more than one exchange")
+    parser.add_argument("--templates", nargs="?", const="errors", choices=["errors", "all"],
+                        help="mine message templates per service from error lines (default) or all lines")
+    parser.add_argument("--follow", action="store_true",
+                        help="tail all logs and show rolling 1m/5m/15m counts per service")
+    parser.add_argument("--interval", type=float, default=FOLLOW_INTERVAL,
+                        help=f"seconds between redraws in --follow mode (default: {FOLLOW_INTERVAL})")
+    parser.add_argument("--index", action="store_true",
+                        help=f"keep per-file checkpoints in {index_dir('LOG_DIR')} and only read appended bytes")
+    return parser
 
 def get_time_window():
     print("\nSelect Time Mode:")
@@ -114,113 +2346,204 @@ def get_error_detail_level():
     choice = input("Enter choice (1/2): ").strip()
     return choice == "2"
 
-def main():
-    start_time, end_time = get_time_window()
-    log_choice = get_log_type()
+def ask_options(args):
+    """Fill the analysis options from the interactive prompts."""
+    args.start_time, args.end_time = get_time_window()
+    args.log_choice = get_log_type()
     
-    show_success_details = False
-    show_error_details = False
+    args.success_details = False
+    args.error_details = False
     
-    if log_choice in ["1", "3"]:
-        show_success_details = get_success_detail_level()
+    if args.log_choice in ["1", "3"]:
+        args.success_details = get_success_detail_level()
     
-    if log_choice in ["2", "3"]:
-        show_error_details = get_error_detail_level()
+    if args.log_choice in ["2", "3"]:
+        args.error_details = get_error_detail_level()
 
-    specific_error = None
-    if log_choice in ["2", "3"]:
+    args.error_filter = None
+    if args.log_choice in ["2", "3"]:
         err = input("Enter specific error to filter (or press Enter for ALL): ").strip()
         if err:
-            specific_error = err.lower()
+            args.error_filter = err.lower()
     
-    specific_success = None
-    if log_choice in ["1", "3"]:
+    args.success_filter = None
+    if args.log_choice in ["1", "3"]:
         succ = input("Enter specific success type to filter (or press Enter for ALL): ").strip()
         if succ:
-            specific_success = succ.lower()
+            args.success_filter = succ.lower()
 
-    # Data structure: service -> hour -> {success, error, error_types, success_types}
-    service_data = defaultdict(lambda: defaultdict(lambda: {
-        "success": 0,
-        "error": 0,
-        "error_types": defaultdict(int),
-        "success_types": defaultdict(int)
-    }))
+def options_from_flags(parser, args):
+    """Fill the analysis options from command-line flags."""
+    if args.last is not None:
+        if args.start or args.end:
+            parser.error("--last cannot be combined with --from/--to")
+        if args.last <= 0:
+            parser.error("--last must be positive")
+        args.end_time = datetime.now()
+        args.start_time = args.end_time - timedelta(hours=args.last)
+    elif args.start and args.end:
+        try:
+            args.start_time = datetime.strptime(args.start, WINDOW_FORMAT)
+            args.end_time = datetime.strptime(args.end, WINDOW_FORMAT)
+        except ValueError as e:
+            parser.error(f"invalid --from/--to time: {e}")
+    else:
+        parser.error("a time window is required: --last HOURS or --from and --to")
 
-    print(f"\nAnalyzing logs from {start_time} to {end_time}...")
-    
-    for file in sorted(os.listdir(LOG_DIR)):
-        path = os.path.join(LOG_DIR, file)
-        if not os.path.isfile(path):
-            continue
+    args.log_choice = LOG_TYPES[args.type or "both"]
+    args.error_filter = args.error_filter.lower() if args.error_filter else None
+    args.success_filter = args.success_filter.lower() if args.success_filter else None
 
-        service = file.replace(".log", "")
-        print(f"Processing {service}...")
+class AnalysisResult:
+    """Counts produced by analyze() for one window, held in an AggregateStore."""
 
-        with open(path, "r", errors="ignore") as f:
-            for line in f:
-                ts = parse_timestamp(line)
-                if not ts:
-                    continue
-                    
-                if not (start_time <= ts <= end_time):
-                    continue
+    def __init__(self, start_time, end_time, query, store, transactions=None, templates=None,
+                 repeats=None):
+        self.start_time = start_time
+        self.end_time = end_time
+        self.query = query
+        self.store = store
+        # TransactionStats when exchanges were correlated
+        self.transactions = transactions
+        # {service: TemplateMiner} when templates were mined
+        self.templates = templates
+        # [RepeatedReference] when repeated references were searched
+        self.repeats = repeats
 
-                hour = ts.strftime("%Y-%m-%d %H:00")
-                result = detect_error_success(line)
-                
-                if result[0] is None:
-                    continue  # Skip if neither success nor error
-                
-                is_error, result_type = result
-                
-                if is_error:
-                    if log_choice in ["2", "3"]:
-                        if not specific_error or specific_error in result_type.lower():
-                            service_data[service][hour]["error"] += 1
-                            service_data[service][hour]["error_types"][result_type] += 1
-                else:
-                    if log_choice in ["1", "3"]:
-                        if not specific_success or specific_success in result_type.lower():
-                            service_data[service][hour]["success"] += 1
-                            service_data[service][hour]["success_types"][result_type] += 1
+    def rollup(self, granularity):
+        """The same result in coarser buckets, without re-reading any log."""
+        return AnalysisResult(self.start_time, self.end_time,
+                              self.query._replace(resolution=granularity),
+                              self.store.rollup(granularity), self.transactions, self.templates,
+                              self.repeats)
+
+def analyze(start_time, end_time, log_choice="3", specific_error=None, specific_success=None,
+            workers=1, use_index=False, log_dir=LOG_DIR, progress=None,
+            granularity=DEFAULT_GRANULARITY, engine="text", transactions=False,
+            exchange_ttl=EXCHANGE_TTL_SECONDS, distributions=False, templates=None,
+            group_by=(), top=10, distinct=False, duplicates=False):
+    """
+    Count success/error lines of every service log in log_dir between
+    start_time and end_time into buckets of granularity seconds. log_choice
+    is "1" (success), "2" (error) or "3" (both); the specific_* filters are
+    lowercase type substrings. engine "mmap" scans plain logs as mapped
+    bytes instead of decoded lines. transactions also correlates the lines
+    of each service by exchangeId, ending exchanges idle for exchange_ttl
+    seconds. distributions sketches payload amounts and line gaps per
+    bucket; it needs a scan, the index only keeps counts. templates ("errors"
+    or "all") mines the message templates of those lines per service.
+    group_by (fields of GROUP_FIELDS) keeps the top heavy hitters among the
+    counted lines by those fields, about top * TOP_CAPACITY_FACTOR of them.
+    distinct estimates the distinct IDs per service, bucket and outcome of
+    the exchanges carrying them. duplicates finds references used by more
+    than one exchange.
+    """
+    if use_index and distributions:
+        raise ValueError("the index keeps counts only, distributions need a full scan")
+    if use_index and group_by:
+        raise ValueError("the index keeps counts only, group_by needs a full scan")
+    store = AggregateStore(granularity)
+    query = Query(to_epoch_us(start_time), to_epoch_us(end_time),
+                  log_choice, specific_error, specific_success, granularity, engine, distributions,
+                  tuple(group_by), top)
+
+    tasks = []
+    stream_tasks = []
+    reference_tasks = []
+    stages = StreamStages(transactions, exchange_ttl, templates, distinct)
+    for service, segments in sorted(discover_segments(log_dir, progress).items()):
+        if progress:
+            progress(f"Processing {service}...")
+
+        paths = []
+        for segment in segments:
+            if not segment.overlaps(query.start_us, query.end_us):
+                continue
+            paths.append(segment.path)
+            if use_index:
+                tasks.append((segment.path, service, query, index_dir(log_dir)))
+            else:
+                for begin, end in plan_segments(segment.path, query, workers):
+                    tasks.append((segment.path, service, begin, end, query))
+        # Exchanges can span segments, so streaming stages see a service as a whole
+        if (transactions or templates or distinct) and paths:
+            stream_tasks.append((service, paths, query, stages))
+        if duplicates and paths:
+            reference_tasks.append((service, paths, query))
+
+    if use_index:
+        prune_checkpoints(log_dir)
+    worker = analyze_indexed if use_index else analyze_segment
+
+    # Partial results are merged in task order, so the report does not
+    # depend on which worker finished first.
+    repeats = None
+    if workers > 1 and len(tasks) + len(stream_tasks) + len(reference_tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = pool.map(worker, tasks)
+            streamed = pool.map(stream_service, stream_tasks)
+            if duplicates:
+                repeats = find_repeated_references(reference_tasks, pool.map)
+            partials, streamed = list(partials), list(streamed)
+    else:
+        partials = map(worker, tasks)
+        streamed = map(stream_service, stream_tasks)
+        if duplicates:
+            repeats = find_repeated_references(reference_tasks)
+
+    for partial in partials:
+        store.merge(partial)
+
+    stats = TransactionStats() if transactions else None
+    mined = {} if templates else None
+    for (service, _, _, _), (partial, miner, distinct_store) in zip(stream_tasks, streamed):
+        if partial is not None:
+            stats.merge(partial)
+        if miner is not None:
+            mined[service] = miner
+        if distinct_store is not None:
+            store.merge(distinct_store)
+
+    return AnalysisResult(start_time, end_time, query, store, stats, mined, repeats)
+
+def print_report(result, show_success_details=False, show_error_details=False):
+    rollups = result.store.rollups()
+    title = bucket_title(result.store.resolution)
 
     print("\n" + "="*50 + " LOG ANALYSIS REPORT " + "="*50)
 
-    total_success = 0
-    total_errors = 0
+    total_success, total_errors = rollups.totals
     
-    for service in sorted(service_data.keys()):
-        service_success = 0
-        service_errors = 0
+    for service, s in rollups.service_names():
+        service_success, service_errors = rollups.service_totals[s]
         
         print(f"\n{'='*60}")
         print(f"SERVICE: {service}")
         print(f"{'='*60}")
         
-        for hour in sorted(service_data[service].keys()):
-            data = service_data[service][hour]
+        for label, b in rollups.service_buckets(s):
+            success, errors = rollups.cells[(s, b)]
+            cell_types = rollups.cell_types[(s, b)]
             
-            if data["success"] == 0 and data["error"] == 0:
+            if success == 0 and errors == 0:
                 continue
                 
-            print(f"\n  Hour: {hour}")
-            print(f"    Success Logs: {data['success']}")
-            print(f"    Error Logs  : {data['error']}")
-            
-            service_success += data["success"]
-            service_errors += data["error"]
+            print(f"\n  {title}: {label}")
+            print(f"    Success Logs: {success}")
+            print(f"    Error Logs  : {errors}")
             
             # Show success types breakdown if requested
-            if show_success_details and data["success_types"]:
+            success_types = rollups.named_types(cell_types, False)
+            if show_success_details and success_types:
                 print("    Success Breakdown:")
-                for succ_type, count in sorted(data["success_types"].items()):
+                for succ_type, count in success_types:
                     print(f"      ✓ {succ_type}: {count}")
             
             # Show error types breakdown if requested
-            if show_error_details and data["error_types"]:
+            error_types = rollups.named_types(cell_types, True)
+            if show_error_details and error_types:
                 print("    Error Breakdown:")
-                for err_type, count in sorted(data["error_types"].items()):
+                for err_type, count in error_types:
                     print(f"      ✗ {err_type}: {count}")
         
         if service_success > 0 or service_errors > 0:
@@ -230,26 +2553,18 @@ def main():
             
             # Show success types summary
             if show_success_details:
-                success_summary = defaultdict(int)
-                for hour_data in service_data[service].values():
-                    for succ_type, count in hour_data["success_types"].items():
-                        success_summary[succ_type] += count
-                
+                success_summary = rollups.named_types(rollups.service_types[s], False)
                 if success_summary:
                     print("    Success Types Summary:")
-                    for succ_type, count in sorted(success_summary.items()):
+                    for succ_type, count in success_summary:
                         print(f"      ✓ {succ_type}: {count}")
             
             # Show error types summary
             if show_error_details:
-                error_summary = defaultdict(int)
-                for hour_data in service_data[service].values():
-                    for err_type, count in hour_data["error_types"].items():
-                        error_summary[err_type] += count
-                
+                error_summary = rollups.named_types(rollups.service_types[s], True)
                 if error_summary:
                     print("    Error Types Summary:")
-                    for err_type, count in sorted(error_summary.items()):
+                    for err_type, count in error_summary:
                         print(f"      ✗ {err_type}: {count}")
             
             if service_errors > 0:
@@ -257,9 +2572,6 @@ def main():
                 print(f"    Error Rate   : {error_rate:.2f}%")
             else:
                 print(f"    Success Rate : 100.00%")
-        
-        total_success += service_success
-        total_errors += service_errors
 
     print(f"\n{'='*120}")
     print("OVERALL SUMMARY:")
@@ -273,29 +2585,19 @@ def main():
         
         # Overall success types summary
         if show_success_details:
-            overall_success_types = defaultdict(int)
-            for service in service_data.values():
-                for hour_data in service.values():
-                    for succ_type, count in hour_data["success_types"].items():
-                        overall_success_types[succ_type] += count
-            
+            overall_success_types = rollups.named_types(rollups.type_totals, False)
             if overall_success_types:
                 print("\nOverall Success Types:")
-                for succ_type, count in sorted(overall_success_types.items()):
+                for succ_type, count in overall_success_types:
                     percentage = (count / total_success * 100) if total_success > 0 else 0
                     print(f"  ✓ {succ_type}: {count} ({percentage:.1f}%)")
         
         # Overall error types summary
         if show_error_details:
-            overall_error_types = defaultdict(int)
-            for service in service_data.values():
-                for hour_data in service.values():
-                    for err_type, count in hour_data["error_types"].items():
-                        overall_error_types[err_type] += count
-            
+            overall_error_types = rollups.named_types(rollups.type_totals, True)
             if overall_error_types:
                 print("\nOverall Error Types:")
-                for err_type, count in sorted(overall_error_types.items()):
+                for err_type, count in overall_error_types:
                     percentage = (count / total_errors * 100) if total_errors > 0 else 0
                     print(f"  ✗ {err_type}: {count} ({percentage:.1f}%)")
     
@@ -311,10 +2613,450 @@ def main():
         print(f"Success to Error Ratio: {total_success}:{total_errors}")
         
         # Count unique services with logs
-        active_services = sum(1 for service in service_data.values() 
-                            if any(hour_data['success'] > 0 or hour_data['error'] > 0 
-                                  for hour_data in service.values()))
+        active_services = sum(1 for ok, err in rollups.service_totals.values() if ok > 0 or err > 0)
         print(f"Active Services: {active_services}")
 
+    if result.store.groups is not None:
+        print_top(result.query, result.store.groups)
+
+    if result.store.sketches:
+        print_distributions(result.store)
+
+    if result.store.distinct:
+        print_distinct(result.store)
+
+    if result.transactions is not None:
+        print_transactions(result.transactions)
+
+    if result.templates is not None:
+        print_templates(result.templates)
+
+    if result.repeats is not None:
+        print_repeats(result.repeats)
+
+def print_top(query, groups):
+    print(f"\nTOP {query.top} BY {','.join(query.group_by).upper()} ({groups.total} lines):")
+    print(f"{'='*40}")
+    widths = [max([len(field)] + [len(str(key[i])) for key, _, _ in groups.top(query.top)])
+              for i, field in enumerate(query.group_by)]
+    print("  " + "  ".join(f"{field:<{w}}" for field, w in zip(query.group_by, widths)) + f"{'Count':>10}")
+    for key, count, error in groups.top(query.top):
+        cells = "  ".join(f"{value:<{w}}" for value, w in zip(key, widths))
+        bound = f"  (+/-{error})" if error else ""
+        print(f"  {cells}{count:>10}{bound}")
+
+def print_repeats(repeats):
+    print(f"\nREPEATED REFERENCES ({len(repeats)} used by more than one exchange):")
+    print(f"{'='*40}")
+    for repeat in repeats[:REPEAT_REPORT_LIMIT]:
+        first = from_epoch_us(repeat.first_us).strftime(TIMESTAMP_FORMAT)[:-3]
+        last = from_epoch_us(repeat.last_us).strftime(TIMESTAMP_FORMAT)[:-3]
+        print(f"  {repeat.reference:<20}{repeat.exchanges:>4} exchanges  {first} .. {last}  "
+              f"{', '.join(repeat.services)}")
+    if len(repeats) > REPEAT_REPORT_LIMIT:
+        print(f"  ... {len(repeats) - REPEAT_REPORT_LIMIT} more")
+
+def print_templates(templates):
+    print(f"\nLOG TEMPLATES (top {TEMPLATE_REPORT_LIMIT} per service):")
+    print(f"{'='*40}")
+    for service, miner in sorted(templates.items()):
+        counts = miner.counts()
+        if not counts:
+            continue
+        print(f"\nSERVICE: {service} ({len(counts)} templates)")
+        for template, count in counts[:TEMPLATE_REPORT_LIMIT]:
+            print(f"  {count:>8}  {template}")
+        if miner.overflow:
+            print(f"  {miner.overflow:>8}  (lines beyond the {miner.max_templates} template limit)")
+
+def print_distributions(store):
+    title = bucket_title(store.resolution)
+    quantiles = "".join(f"{f'p{q * 100:g}':>14}" for q in TRANSACTION_QUANTILES)
+    print("\nDISTRIBUTIONS (payload amounts, gap to previous line in ms):")
+    print(f"{'='*40}")
+    for service, buckets in store.distributions().items():
+        print(f"\nSERVICE: {service}")
+        for bucket, sketches in buckets.items():
+            print(f"  {title}: {bucket_label(bucket, store.resolution)}")
+            print(f"    {'Metric':<20}{'Count':>8}{quantiles}")
+            for metric, sketch in sketches.items():
+                cells = "".join(f"{sketch.quantile(q):>14.2f}" for q in TRANSACTION_QUANTILES)
+                print(f"    {metric:<20}{sketch.count:>8}{cells}")
+
+def print_distinct(store):
+    title = bucket_title(store.resolution)
+    outcomes = TransactionStats.OUTCOMES + ("uncorrelated",)
+    print("\nDISTINCT IDS (HyperLogLog estimates, by transaction outcome):")
+    print(f"{'='*40}")
+    for service, buckets in store.distinct_counts().items():
+        print(f"\nSERVICE: {service}")
+        for bucket, fields in buckets.items():
+            print(f"  {title}: {bucket_label(bucket, store.resolution)}")
+            print(f"    {'Field':<20}" + "".join(f"{outcome.capitalize():>14}" for outcome in outcomes))
+            for field, sketches in fields.items():
+                cells = "".join(f"{sketches[o].estimate() if o in sketches else 0:>14}" for o in outcomes)
+                print(f"    {field:<20}{cells}")
+
+def print_transactions(stats):
+    quantiles = "".join(f"{f'p{q * 100:g} ms':>11}" for q in TRANSACTION_QUANTILES)
+    print("\nTRANSACTIONS (correlated by exchangeId):")
+    print(f"{'='*40}")
+    for service, rows in stats.services().items():
+        print(f"\nSERVICE: {service}")
+        print(f"  {'Operation':<28}{'Count':>8}{'Success':>9}{'Error':>8}{'Unclassified':>14}"
+              f"{'Incomplete':>12}{quantiles}")
+        total = stats.service_total(rows)
+        for operation, outcomes, _, sketch in rows + [("(all)", *total)]:
+            cells = "".join(f"{sketch.quantile(q):>11.1f}" for q in TRANSACTION_QUANTILES)
+            print(f"  {operation:<28}{sketch.count:>8}{outcomes['success']:>9}"
+                  f"{outcomes['error']:>8}{outcomes['unclassified']:>14}{outcomes['incomplete']:>12}{cells}")
+        error_types = total[1]
+        if error_types:
+            print("  Failed Transactions by Error Type:")
+            for err_type, count in sorted(error_types.items(), key=lambda item: (-item[1], item[0])):
+                print(f"    ✗ {err_type}: {count}")
+
+    ranges = [f"<={bound}" for bound in STEP_HISTOGRAM_MS] + [f">{STEP_HISTOGRAM_MS[-1]}"]
+    print("\nOPERATION STEPS (start to end within each exchange, ms):")
+    print(f"{'='*40}")
+    for service, rows in stats.step_services().items():
+        print(f"\nSERVICE: {service}")
+        print(f"  {'Operation':<28}{'Count':>8}{'Failed':>8}{'Unfinished':>12}{quantiles}"
+              + "".join(f"{label:>9}" for label in ranges))
+        for operation, failed, unfinished, sketch in rows:
+            cells = "".join("-".rjust(11) if sketch.count == 0 else f"{sketch.quantile(q):>11.1f}"
+                            for q in TRANSACTION_QUANTILES)
+            histogram = "".join(f"{count:>9}" for count in sketch.histogram(STEP_HISTOGRAM_MS))
+            print(f"  {operation:<28}{sketch.count + unfinished:>8}{failed:>8}{unfinished:>12}{cells}{histogram}")
+
+# ---------- machine-readable exports ----------
+def _rate(part, total):
+    return round(part / total * 100, 4) if total else 0.0
+
+def export_json(result):
+    rollups = result.store.rollups()
+    services = {}
+    for service, s in rollups.service_names():
+        success, errors = rollups.service_totals[s]
+        buckets = {}
+        for label, b in rollups.service_buckets(s):
+            cell_success, cell_errors = rollups.cells[(s, b)]
+            buckets[label] = {
+                "success": cell_success,
+                "error": cell_errors,
+                "success_types": dict(rollups.named_types(rollups.cell_types[(s, b)], False)),
+                "error_types": dict(rollups.named_types(rollups.cell_types[(s, b)], True)),
+            }
+        services[service] = {
+            "success": success,
+            "error": errors,
+            "error_rate": _rate(errors, success + errors),
+            "success_types": dict(rollups.named_types(rollups.service_types[s], False)),
+            "error_types": dict(rollups.named_types(rollups.service_types[s], True)),
+            "buckets": buckets,
+        }
+    total_success, total_errors = rollups.totals
+    return json.dumps({
+        "window": {"start": result.start_time.isoformat(), "end": result.end_time.isoformat()},
+        "granularity": format_granularity(result.store.resolution),
+        "success": total_success,
+        "error": total_errors,
+        "error_rate": _rate(total_errors, total_success + total_errors),
+        "success_types": dict(rollups.named_types(rollups.type_totals, False)),
+        "error_types": dict(rollups.named_types(rollups.type_totals, True)),
+        "services": services,
+        **({} if not result.store.sketches else {"distributions": {
+            service: {
+                bucket_label(bucket, result.store.resolution): {
+                    metric: _sketch_json(sketch) for metric, sketch in sketches.items()
+                }
+                for bucket, sketches in buckets.items()
+            }
+            for service, buckets in result.store.distributions().items()
+        }}),
+        **({} if not result.store.distinct else {"distinct": {
+            service: {
+                bucket_label(bucket, result.store.resolution): {
+                    field: {
+                        outcome: {"estimate": sketch.estimate(), "sketch": sketch.to_dict()}
+                        for outcome, sketch in sketches.items()
+                    }
+                    for field, sketches in fields.items()
+                }
+                for bucket, fields in buckets.items()
+            }
+            for service, buckets in result.store.distinct_counts().items()
+        }}),
+        **({} if result.store.groups is None else {"top": {
+            "group_by": list(result.query.group_by),
+            "lines": result.store.groups.total,
+            "keys": [
+                {"key": dict(zip(result.query.group_by, key)), "count": count, "max_overcount": error}
+                for key, count, error in result.store.groups.top(result.query.top)
+            ],
+        }}),
+        **({} if result.templates is None else {"templates": {
+            service: {
+                "templates": [{"template": template, "count": count} for template, count in miner.counts()],
+                "overflow": miner.overflow,
+            }
+            for service, miner in sorted(result.templates.items())
+        }}),
+        **({} if result.repeats is None else {"repeated_references": [
+            {
+                "reference": repeat.reference,
+                "exchanges": repeat.exchanges,
+                "services": repeat.services,
+                "first_seen": from_epoch_us(repeat.first_us).isoformat(),
+                "last_seen": from_epoch_us(repeat.last_us).isoformat(),
+            }
+            for repeat in result.repeats
+        ]}),
+        **({} if result.transactions is None else {"transactions": {
+            service: {
+                **_transactions_json(*result.transactions.service_total(rows)),
+                "operations": {operation: _transactions_json(*group) for operation, *group in rows},
+                "steps": {
+                    operation: _step_json(*step)
+                    for operation, *step in result.transactions.step_services().get(service, [])
+                },
+            }
+            for service, rows in result.transactions.services().items()
+        }}),
+    }, indent=2)
+
+def _transactions_json(outcomes, error_types, sketch):
+    return {
+        "count": sketch.count,
+        **outcomes,
+        "error_types": dict(sorted(error_types.items())),
+        "duration_ms": {
+            f"p{q * 100:g}": None if sketch.count == 0 else round(sketch.quantile(q), 3)
+            for q in TRANSACTION_QUANTILES
+        },
+    }
+
+def _step_json(failed, unfinished, sketch):
+    counts = sketch.histogram(STEP_HISTOGRAM_MS)
+    labels = [f"<={bound}" for bound in STEP_HISTOGRAM_MS] + [f">{STEP_HISTOGRAM_MS[-1]}"]
+    return {
+        "count": sketch.count + unfinished,
+        "failed": failed,
+        "unfinished": unfinished,
+        "duration_ms": {
+            f"p{q * 100:g}": None if sketch.count == 0 else round(sketch.quantile(q), 3)
+            for q in TRANSACTION_QUANTILES
+        },
+        "histogram_ms": dict(zip(labels, counts)),
+    }
+
+def _sketch_json(sketch):
+    return {
+        "count": sketch.count,
+        **{f"p{q * 100:g}": round(sketch.quantile(q), 3) for q in TRANSACTION_QUANTILES},
+        "sketch": sketch.to_dict(),
+    }
+
+def export_csv(result):
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(["service", "bucket", "outcome", "type", "count"])
+    for service, label, is_error, type_name, count in sorted(result.store.rows()):
+        writer.writerow([service, label, "error" if is_error else "success", type_name, count])
+    return out.getvalue()
+
+def _prom_label(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def export_prometheus(result):
+    """Window totals in the Prometheus text exposition format."""
+    rollups = result.store.rollups()
+    types = result.store.types
+    lines = [
+        "# HELP log_analyzer_lines Classified log lines in the analysis window.",
+        "# TYPE log_analyzer_lines gauge",
+    ]
+    for service, s in rollups.service_names():
+        for t, count in sorted(rollups.service_types[s].items(), key=lambda item: types[item[0]]):
+            is_error, type_name = types[t]
+            lines.append(
+                f'log_analyzer_lines{{service="{_prom_label(service)}",'
+                f'outcome="{"error" if is_error else "success"}",type="{_prom_label(type_name)}"}} {count}'
+            )
+    lines += [
+        "# HELP log_analyzer_error_ratio Share of classified lines that are errors.",
+        "# TYPE log_analyzer_error_ratio gauge",
+    ]
+    for service, s in rollups.service_names():
+        success, errors = rollups.service_totals[s]
+        ratio = errors / (success + errors) if success + errors else 0.0
+        lines.append(f'log_analyzer_error_ratio{{service="{_prom_label(service)}"}} {ratio:.6f}')
+    if result.store.sketches:
+        totals = {}
+        for (s, _, metric), sketch in result.store.sketches.items():
+            key = (result.store.services[s], metric)
+            if key not in totals:
+                totals[key] = QuantileSketch(sketch.relative_accuracy)
+            totals[key].merge(sketch)
+        lines += [
+            "# HELP log_analyzer_sampled_value Payload amounts and gaps to the previous line (ms) in the window.",
+            "# TYPE log_analyzer_sampled_value summary",
+        ]
+        for (service, metric), sketch in sorted(totals.items()):
+            labels = f'service="{_prom_label(service)}",metric="{metric}"'
+            for q in TRANSACTION_QUANTILES:
+                lines.append(f'log_analyzer_sampled_value{{{labels},quantile="{q:g}"}} {sketch.quantile(q):.6f}')
+            lines.append(f"log_analyzer_sampled_value_sum{{{labels}}} {sketch.sum:.6f}")
+            lines.append(f"log_analyzer_sampled_value_count{{{labels}}} {sketch.count}")
+
+    if result.store.distinct:
+        totals = {}
+        for (s, _, field, outcome), sketch in result.store.distinct.items():
+            key = (result.store.services[s], field, outcome)
+            if key not in totals:
+                totals[key] = HyperLogLog(sketch.precision)
+            totals[key].merge(sketch)
+        lines += [
+            "# HELP log_analyzer_distinct_ids Estimated distinct IDs in the window by transaction outcome.",
+            "# TYPE log_analyzer_distinct_ids gauge",
+        ]
+        for (service, field, outcome), sketch in sorted(totals.items()):
+            lines.append(f'log_analyzer_distinct_ids{{service="{_prom_label(service)}",field="{field}",'
+                         f'outcome="{outcome}"}} {sketch.estimate()}')
+
+    if result.repeats is not None:
+        lines += [
+            "# HELP log_analyzer_repeated_references References used by more than one exchange in the window.",
+            "# TYPE log_analyzer_repeated_references gauge",
+            f"log_analyzer_repeated_references {len(result.repeats)}",
+        ]
+
+    if result.store.groups is not None:
+        lines += [
+            "# HELP log_analyzer_top_lines Counted lines of the most frequent --group-by keys (may overcount).",
+            "# TYPE log_analyzer_top_lines gauge",
+        ]
+        for key, count, _ in result.store.groups.top(result.query.top):
+            labels = ",".join(f'{field}="{_prom_label(value)}"'
+                              for field, value in zip(result.query.group_by, key))
+            lines.append(f"log_analyzer_top_lines{{{labels}}} {count}")
+
+    if result.transactions is not None:
+        rows = [
+            (f'service="{_prom_label(service)}",operation="{_prom_label(operation)}"', outcomes, sketch)
+            for service, groups in result.transactions.services().items()
+            for operation, outcomes, _, sketch in groups
+        ]
+        lines += [
+            "# HELP log_analyzer_transactions Exchanges correlated by exchangeId, by final outcome.",
+            "# TYPE log_analyzer_transactions gauge",
+        ]
+        for labels, outcomes, _ in rows:
+            for outcome, count in outcomes.items():
+                lines.append(f'log_analyzer_transactions{{{labels},outcome="{outcome}"}} {count}')
+        lines += [
+            "# HELP log_analyzer_transaction_duration_seconds First to last line time of correlated exchanges.",
+            "# TYPE log_analyzer_transaction_duration_seconds summary",
+        ]
+        for labels, _, sketch in rows:
+            for q in TRANSACTION_QUANTILES:
+                lines.append(f'log_analyzer_transaction_duration_seconds{{{labels},quantile="{q:g}"}} '
+                             f'{sketch.quantile(q) / 1000:.6f}')
+            lines.append(f"log_analyzer_transaction_duration_seconds_sum{{{labels}}} {sketch.sum / 1000:.6f}")
+            lines.append(f"log_analyzer_transaction_duration_seconds_count{{{labels}}} {sketch.count}")
+
+        steps = [
+            (f'service="{_prom_label(service)}",operation="{_prom_label(operation)}"', failed, unfinished, sketch)
+            for service, groups in result.transactions.step_services().items()
+            for operation, failed, unfinished, sketch in groups
+        ]
+        lines += [
+            "# HELP log_analyzer_operation_steps Operation steps inside correlated exchanges, by result.",
+            "# TYPE log_analyzer_operation_steps gauge",
+        ]
+        for labels, failed, unfinished, sketch in steps:
+            lines.append(f'log_analyzer_operation_steps{{{labels},result="failed"}} {failed}')
+            lines.append(f'log_analyzer_operation_steps{{{labels},result="unfinished"}} {unfinished}')
+        lines += [
+            "# HELP log_analyzer_operation_duration_seconds Start to end time of finished operation steps.",
+            "# TYPE log_analyzer_operation_duration_seconds histogram",
+        ]
+        for labels, _, _, sketch in steps:
+            for bound in STEP_HISTOGRAM_MS:
+                lines.append(f'log_analyzer_operation_duration_seconds_bucket{{{labels},le="{bound / 1000:g}"}} '
+                             f'{sketch.count_at_most(bound)}')
+            lines.append(f'log_analyzer_operation_duration_seconds_bucket{{{labels},le="+Inf"}} {sketch.count}')
+            lines.append(f"log_analyzer_operation_duration_seconds_sum{{{labels}}} {sketch.sum / 1000:.6f}")
+            lines.append(f"log_analyzer_operation_duration_seconds_count{{{labels}}} {sketch.count}")
+    lines += [
+        "# HELP log_analyzer_window_seconds Analysis window bounds as Unix timestamps.",
+        "# TYPE log_analyzer_window_seconds gauge",
+        f'log_analyzer_window_seconds{{edge="start"}} {result.start_time.timestamp():.3f}',
+        f'log_analyzer_window_seconds{{edge="end"}} {result.end_time.timestamp():.3f}',
+    ]
+    return "\n".join(lines) + "\n"
+
+EXPORTERS = {
+    "json": export_json,
+    "csv": export_csv,
+    "prometheus": export_prometheus,
+}
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.workers < 1 or args.top < 1:
+        parser.error("--workers and --top must be at least 1")
+    if args.exchange_ttl <= 0 or args.interval <= 0:
+        parser.error("--exchange-ttl and --interval must be positive")
+    if args.follow:
+        follow(args.interval, args.log_dir)
+        return
+
+    try:
+        args.granularity = parse_granularity(args.granularity)
+        args.group_by = parse_group_by(args.group_by) if args.group_by else ()
+    except ValueError as e:
+        parser.error(str(e))
+    if args.index and args.granularity % INDEX_RESOLUTION:
+        parser.error(f"--index needs a granularity that is a multiple of {INDEX_RESOLUTION}s")
+    if args.index and args.distributions:
+        parser.error("--distributions needs a full scan and cannot be combined with --index")
+    if args.index and args.group_by:
+        parser.error("--group-by needs a full scan and cannot be combined with --index")
+    if args.format == "csv":
+        sections = [flag for flag, used in (
+            ("--transactions", args.transactions), ("--distributions", args.distributions),
+            ("--distinct", args.distinct), ("--group-by", args.group_by),
+            ("--templates", args.templates), ("--duplicates", args.duplicates)) if used]
+        if sections:
+            parser.error(f"--format csv holds the line counts only, use --format json with "
+                         f"{', '.join(sections)}")
+
+    # Identity checks, --last 0 is a given flag too
+    if any(getattr(args, name) is not None and getattr(args, name) is not False for name in QUERY_FLAGS):
+        options_from_flags(parser, args)
+    elif args.format != "text":
+        # The prompts would end up in the machine-readable output
+        parser.error(f"--format {args.format} needs a time window: --last HOURS or --from and --to")
+    else:
+        ask_options(args)
+
+    text = args.format == "text"
+    if text:
+        print(f"\nAnalyzing logs from {args.start_time} to {args.end_time}...")
+    result = analyze(args.start_time, args.end_time, args.log_choice,
+                     args.error_filter, args.success_filter,
+                     workers=args.workers, use_index=args.index, log_dir=args.log_dir,
+                     progress=print if text else None, granularity=args.granularity,
+                     engine=args.engine, transactions=args.transactions,
+                     exchange_ttl=args.exchange_ttl, distributions=args.distributions,
+                     templates=args.templates, group_by=args.group_by, top=args.top,
+                     distinct=args.distinct, duplicates=args.duplicates)
+    if text:
+        print_report(result, args.success_details, args.error_details)
+    else:
+        sys.stdout.write(EXPORTERS[args.format](result))
+
 if __name__ == "__main__":
     main()
@@ -1,3 +1,5 @@
+import argparse
+import asyncio
 import subprocess
 import os
 import signal
@@ -6,6 +8,12 @@ import time
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 GEN_DIR = os.path.join(BASE_DIR, "generators")
+REPORT_SECONDS = 5
+IDLE_SECONDS = 0.25
+
+sys.path.insert(0, GEN_DIR)
+import _logwriter  # noqa: E402
+import _runtime as runtime  # noqa: E402
 
 processes = []
 
@@ -16,40 +24,164 @@ def shutdown(signum, frame):
             p.terminate()
         except Exception:
             pass
+    # Generators write their buffered lines on SIGTERM, let them finish
+    for p in processes:
+        try:
+            p.wait(timeout=5)
+        except Exception:
+            pass
     print("✅ All generators stopped cleanly.")
     sys.exit(0)
 
-signal.signal(signal.SIGINT, shutdown)
-signal.signal(signal.SIGTERM, shutdown)
+def start_processes(names, concurrency, speed):
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    print("🚀 Starting all log generators...\n")
+    env = dict(os.environ, GENERATOR_CONCURRENCY=str(concurrency), GENERATOR_SPEED=str(speed))
+
+    for name in names:
+        print(f"▶ Starting {name}")
+
+        p = subprocess.Popen(
+            ["python3", os.path.join(GEN_DIR, "_flows.py"), name],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=env
+        )
 
-print("🚀 Starting all log generators...\n")
+        processes.append(p)
 
-scripts = sorted([
-    f for f in os.listdir(GEN_DIR)
-    if f.endswith(".py")
-])
+        # slight stagger – looks more real, avoids burst
+        time.sleep(0.4)
 
-if not scripts:
-    print("❌ No generator scripts found.")
-    sys.exit(1)
+    print("\n✅ All log generators are running.")
+    print("ℹ️  Press CTRL+C to stop all generators.\n")
 
-for script in scripts:
-    script_path = os.path.join(GEN_DIR, script)
-    print(f"▶ Starting {script}")
+    while True:
+        time.sleep(1)
 
-    p = subprocess.Popen(
-        ["python3", script_path],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL
-    )
+# ---------- single process ----------
+async def exchange(module, slots):
+    try:
+        for delay in runtime.pauses(module.generate()):
+            await asyncio.sleep(delay)
+    finally:
+        slots.release()
 
-    processes.append(p)
+async def feed(module, rate, concurrency):
+    """
+    Start flows of one generator at random (Poisson) times rate per second
+    apart, at most concurrency of them at once; a new flow waits for a free
+    slot rather than piling up.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    running = set()
+    while True:
+        await slots.acquire()
+        task = asyncio.create_task(exchange(module, slots))
+        running.add(task)
+        task.add_done_callback(running.discard)
+        await asyncio.sleep(runtime.rng.expovariate(rate))
 
-    # slight stagger – looks more real, avoids burst
-    time.sleep(0.4)
+async def flush_idle():
+    while True:
+        _logwriter.idle(IDLE_SECONDS)
+        await asyncio.sleep(IDLE_SECONDS)
 
-print("\n✅ All log generators are running.")
-print("ℹ️  Press CTRL+C to stop all generators.\n")
+async def report():
+    last, since = 0, time.monotonic()
+    while True:
+        await asyncio.sleep(REPORT_SECONDS)
+        lines, moment = _logwriter.lines_written(), time.monotonic()
+        print(f"📈 {(lines - last) / (moment - since):,.0f} lines/s ({lines} lines written)", flush=True)
+        last, since = lines, moment
+
+async def orchestrate(generators, settings):
+    tasks = [asyncio.create_task(feed(generators[name], rate, concurrency))
+             for name, (rate, concurrency) in settings.items()]
+    tasks += [asyncio.create_task(flush_idle()), asyncio.create_task(report())]
+    await asyncio.gather(*tasks)
+
+def run_single_process(generators, settings):
+    # SIGTERM stops the same way as CTRL+C, after the buffered lines are written
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print("🚀 Running all log generators in this process...\n")
+    for name, (rate, concurrency) in settings.items():
+        print(f"▶ {name}: {rate:g} flows/s, up to {concurrency} at once")
+    print("\nℹ️  Press CTRL+C to stop all generators.\n")
+    began = time.monotonic()
+    try:
+        asyncio.run(orchestrate(generators, settings))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _logwriter.close_all()
+    lines = _logwriter.lines_written()
+    print(f"\n✅ All generators stopped cleanly: {lines} lines, "
+          f"{lines / (time.monotonic() - began):,.0f} lines/s.")
+
+def parse_service(value):
+    """NAME:RATE[:CONCURRENCY] -> (name, rate, concurrency or None)."""
+    parts = value.split(":")
+    if len(parts) not in (2, 3):
+        raise ValueError(f"expected NAME:RATE[:CONCURRENCY], got {value!r}")
+    rate = float(parts[1])
+    concurrency = int(parts[2]) if len(parts) == 3 else None
+    if rate <= 0 or (concurrency is not None and concurrency < 1):
+        raise ValueError(f"rate and concurrency must be positive in {value!r}")
+    return parts[0], rate, concurrency
+
+def main():
+    parser = argparse.ArgumentParser(description="Start all log generators.")
+    parser.add_argument("--single-process", action="store_true",
+                        help="run the generator flows as asyncio tasks in this process "
+                             "instead of one process per generator")
+    parser.add_argument("--rate", type=float,
+                        help="with --single-process: flows started per second by every generator "
+                             "(default: each generator's own pace times --speed)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="flows of one generator running at once (default: 4)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="start every generator's flows this many times as often as its own "
+                             "pace (default: 1)")
+    parser.add_argument("--service", action="append", default=[], metavar="NAME:RATE[:CONCURRENCY]",
+                        help="with --single-process: rate and concurrency of one generator, repeatable")
+    parser.add_argument("--services", metavar="NAMES",
+                        help="comma list of generators to run (default: all)")
+    args = parser.parse_args()
+
+    names = runtime.generator_names()
+    if not names:
+        print("❌ No generator scripts found.")
+        sys.exit(1)
+    if args.services:
+        wanted = [name.strip() for name in args.services.split(",") if name.strip()]
+        unknown = sorted(set(wanted) - set(names))
+        if unknown:
+            parser.error(f"unknown generators: {', '.join(unknown)}")
+        names = [name for name in names if name in wanted]
+
+    if (args.rate is not None and args.rate <= 0) or args.concurrency < 1 or args.speed <= 0:
+        parser.error("--rate, --concurrency and --speed must be positive")
+    if not args.single_process:
+        if args.service:
+            parser.error("--service needs --single-process")
+        start_processes(names, args.concurrency, args.speed)
+        return
+
+    generators = {name: runtime.load_generator(name) for name in names}
+    settings = {name: (args.rate or runtime.pace(generator) * args.speed, args.concurrency)
+                for name, generator in generators.items()}
+    for value in args.service:
+        try:
+            name, rate, concurrency = parse_service(value)
+        except ValueError as e:
+            parser.error(f"invalid --service: {e}")
+        if name not in settings:
+            parser.error(f"unknown or unselected generator in --service: {name}")
+        settings[name] = (rate, concurrency or settings[name][1])
+    run_single_process(generators, settings)
 
-while True:
-    time.sleep(1)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import importlib.util
+import os
+import sys
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+spec = importlib.util.spec_from_file_location("log_analyzer", os.path.join(ROOT, "log-analyzer.py"))
+la = importlib.util.module_from_spec(spec)
+# Worker processes unpickle the analyzer's functions by module name
+sys.modules[spec.name] = la
+spec.loader.exec_module(la)
+
+BASE = datetime(2025, 11, 27, 10, 0)
+
+MESSAGES = [
+    "SUCCESS posting done",
+    "ERROR: posting rejected",
+    '"returnCode": "0"',
+    '"returnCode": "17"',
+    "step failed",
+    "validation passed",
+    "heartbeat",
+    'GET /api/v1" 404 12',
+]
+
+
+def log_line(moment, message, thread="executor-thread-1"):
+    return (f"{moment:%Y-%m-%d %H:%M:%S},{moment.microsecond // 1000:03d} INFO  "
+            f"[com.fin.mta.Service] ({thread}) {message}")
+
+
+def timed_lines(rng, count, start=BASE, step_ms=250, jitter_ms=0, messages=MESSAGES):
+    """count log lines step_ms apart from start, each moved by up to jitter_ms either way."""
+    lines = []
+    for i in range(count):
+        offset = i * step_ms + (rng.randint(-jitter_ms, jitter_ms) if jitter_ms else 0)
+        lines.append(log_line(start + timedelta(milliseconds=offset), rng.choice(messages)))
+    return lines
+
+
+def write_log(path, lines, newline="\n", terminated=True):
+    data = newline.join(lines) + (newline if terminated else "")
+    with open(path, "ab") as f:
+        f.write(data.encode("utf-8"))
+
+
+def store_counts(store):
+    """{(service, bucket, is_error, type): count} of an AggregateStore."""
+    counts = {}
+    for s, b, t, count in zip(store.service_col, store.bucket_col, store.type_col, store.count_col):
+        if count:
+            key = (store.services[s], b) + store.types[t]
+            counts[key] = counts.get(key, 0) + count
+    return counts
+
+
+def scan_counts(log_dir, start_time, end_time, granularity=la.DEFAULT_GRANULARITY):
+    """store_counts() of every line in the window, read without any locator, split or index."""
+    start_us, end_us = la.to_epoch_us(start_time), la.to_epoch_us(end_time)
+    counts = {}
+    for file in sorted(os.listdir(log_dir)):
+        path = os.path.join(log_dir, file)
+        if not os.path.isfile(path):
+            continue
+        service = la.parse_segment_name(file)[0]
+        with la.open_log(path) as f:
+            for raw in f:
+                line = raw.decode("utf-8", errors="ignore")
+                ts = la.parse_epoch_us(line)
+                if ts is None or not start_us <= ts <= end_us:
+                    continue
+                result = la.detect_error_success(line)
+                if result[0] is None:
+                    continue
+                key = (service, ts // (granularity * 1000000)) + result
+                counts[key] = counts.get(key, 0) + 1
+    return counts
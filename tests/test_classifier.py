@@ -0,0 +1,145 @@
+import random
+import re
+import unittest
+
+from helpers import la
+
+
+def reference_detect_error_success(message):
+    """The original one-regex-at-a-time classifier the compiled rules must agree with."""
+    for pattern_name, pattern in la.ERROR_PATTERNS.items():
+        if re.search(pattern, message):
+            return (True, pattern_name)
+
+    for pattern_name, pattern in la.SUCCESS_PATTERNS.items():
+        if re.search(pattern, message, re.IGNORECASE):
+            if "ERROR:" in message and "SUCCESS" in message:
+                continue
+            return (False, pattern_name)
+
+    http_match = re.search(r'"\s+(\d{3})\s+', message)
+    if http_match:
+        status = http_match.group(1)
+        if status.startswith('4') or status.startswith('5'):
+            return (True, f"HTTP_{status}")
+        elif status.startswith('2'):
+            return (False, f"HTTP_{status}")
+
+    returncode_match = re.search(r'"returnCode"\s*:\s*"([^0]\d*)"', message)
+    if returncode_match and returncode_match.group(1) != "0":
+        return (True, f"returnCode={returncode_match.group(1)}")
+
+    return (None, None)
+
+
+PREFIX = "2026-10-18 12:00:00,000 INFO  [exec-1] (svc) "
+
+TOKENS = [
+    "ERROR", "ERROR:", "error", "Error", "SUCCESS", "success", "Success", "failed", "FAILED",
+    "passed", "PASSED", "999", "error 999", "999 Error", "duplicate key value violates unique constraint",
+    "Finalized Successfully", "finalized successfully", "returncode=1", "returncode=0", "returncode: '0'",
+    "RETURNCODE=0", '"returnCode":"0"', '"returnCode": "7"', '"returnCode" : "12"', '"returnCode"',
+    "Response => '{\"returnCode\":\"0\"", '"', '" ', " 200 ", " 301 ", " 404 ", " 504 ", " 500 ",
+    "200", "404", "GET /api", "HTTP/1.1\"", "ſuccess", "paſſed", "Finalized Succeſſfully", "\u212a",
+    "\x1c", "\x1d", "\x1e", "\x1f", "\t", " ", "  ", ":", "=", "'", "{", "}", "x", "value",
+]
+
+
+def random_message(rng):
+    parts = [rng.choice(TOKENS) for _ in range(rng.randint(1, 8))]
+    joiners = ["", " ", "\t", "\x1f"]
+    return PREFIX + "".join(part + rng.choice(joiners) for part in parts)
+
+
+class DetectErrorSuccessTest(unittest.TestCase):
+
+    def assertAgrees(self, message):
+        self.assertEqual(la.detect_error_success(message), reference_detect_error_success(message), repr(message))
+
+    def test_error_colon_with_success_prefers_error(self):
+        message = PREFIX + "ERROR: step reported SUCCESS"
+        self.assertEqual(la.detect_error_success(message), (True, "ERROR"))
+        self.assertAgrees(message)
+
+    def test_error_colon_with_success_skips_success_rules(self):
+        message = PREFIX + "SUCCESS after ERROR: retry passed"
+        self.assertAgrees(message)
+        self.assertAgrees(PREFIX + 'xERROR: SUCCESS "returnCode":"0" " 200 ')
+
+    def test_first_http_status_redirect(self):
+        # The 3xx status is the first on the line, so no status rule applies
+        message = PREFIX + '"GET /a HTTP/1.1" 301 0 "GET /b HTTP/1.1" 200 0'
+        self.assertEqual(la.detect_error_success(message), reference_detect_error_success(message))
+        self.assertEqual(la.detect_error_success(message), (None, None))
+
+    def test_http_status_after_redirect_token(self):
+        self.assertAgrees(PREFIX + '" 302 x" 404 ')
+        self.assertAgrees(PREFIX + '" 302 " 504 ')
+
+    def test_non_ascii_case_folding(self):
+        for message in (PREFIX + "ſuccess", PREFIX + "paſſed", PREFIX + "Finalized Succeſſfully",
+                        PREFIX + "\u212a ſUCCESS", PREFIX + "\u212aey"):
+            self.assertAgrees(message)
+        self.assertEqual(la.detect_error_success(PREFIX + "ſuccess"), (False, "SUCCESS"))
+
+    def test_ascii_separators_are_whitespace(self):
+        for sep in "\x1c\x1d\x1e\x1f":
+            self.assertAgrees(PREFIX + f'"{sep}404{sep}')
+            self.assertAgrees(PREFIX + f'"returnCode"{sep}:{sep}"5"')
+            self.assertAgrees(PREFIX + f'returncode{sep}={sep}0')
+        self.assertEqual(la.detect_error_success(PREFIX + '"\x1f404\x1f'), (True, "HTTP_400"))
+
+    def test_random_messages(self):
+        rng = random.Random(20261018)
+        for _ in range(5000):
+            self.assertAgrees(random_message(rng))
+
+
+class BufferClassifierTest(unittest.TestCase):
+
+    def classify_chunk(self, messages):
+        """Classify a chunk the way scan_window does, text path lines with detect_error_success."""
+        chunk = "\n".join(messages).encode("utf-8") + b"\n"
+        results = {}
+        for line_start, mask in la.BUFFER_CLASSIFIER.candidate_lines(chunk):
+            newline = chunk.find(b"\n", line_start)
+            raw = chunk[line_start:newline + 1]
+            if la.needs_text_path(raw):
+                results[line_start] = la.detect_error_success(raw.decode("utf-8"))
+            else:
+                results[line_start] = la.BUFFER_CLASSIFIER.classify_bytes(raw, mask)
+        return chunk, results
+
+    def assertChunkAgrees(self, messages):
+        chunk, results = self.classify_chunk(messages)
+        line_start = 0
+        for message in messages:
+            expected = reference_detect_error_success(message + "\n")
+            self.assertEqual(results.get(line_start, (None, None)), expected, repr(message))
+            line_start += len((message + "\n").encode("utf-8"))
+        self.assertEqual(line_start, len(chunk))
+
+    def test_edge_cases(self):
+        self.assertChunkAgrees([
+            PREFIX + "ERROR: step reported SUCCESS",
+            PREFIX + '"GET /a HTTP/1.1" 301 0 "GET /b HTTP/1.1" 200 0',
+            PREFIX + "ſuccess",
+            PREFIX + "\u212a passed",
+            PREFIX + '"\x1f404\x1f',
+            PREFIX + '"returnCode"\x1c:\x1c"5"',
+            PREFIX + "nothing to see",
+        ])
+
+    def test_bytes_path_skips_separator_lines(self):
+        self.assertTrue(la.needs_text_path(b'"\x1e404\x1e\n'))
+        self.assertTrue(la.needs_text_path("ſuccess\n".encode("utf-8")))
+        self.assertFalse(la.needs_text_path(b'" 404 \n'))
+
+    def test_random_chunks(self):
+        rng = random.Random(1018)
+        for _ in range(200):
+            self.assertChunkAgrees([random_message(rng) for _ in range(rng.randint(1, 40))])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from helpers import ROOT
+
+
+def run(*args):
+    return subprocess.run([sys.executable, os.path.join(ROOT, "log-analyzer.py"), *args],
+                          stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=60)
+
+
+class ArgumentsTest(unittest.TestCase):
+
+    def assertRejected(self, *args, message):
+        result = run(*args)
+        self.assertEqual(result.returncode, 2, result.stderr)
+        self.assertIn(message, result.stderr)
+        self.assertEqual(result.stdout, "")
+
+    def test_non_positive_values(self):
+        self.assertRejected("--last", "1", "--workers", "0", message="--workers and --top must be at least 1")
+        self.assertRejected("--last", "1", "--top", "-3", message="--workers and --top must be at least 1")
+        self.assertRejected("--last", "1", "--exchange-ttl", "0", message="must be positive")
+        self.assertRejected("--follow", "--interval", "-1", message="must be positive")
+        self.assertRejected("--last", "0", message="--last must be positive")
+
+    def test_machine_formats_need_a_window(self):
+        for fmt in ("json", "csv", "prometheus"):
+            self.assertRejected("--format", fmt, message="needs a time window")
+
+    def test_csv_rejects_sections(self):
+        self.assertRejected("--last", "1", "--format", "csv", "--transactions", "--distinct",
+                            message="--transactions, --distinct")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import gzip
+import os
+import random
+import tempfile
+import unittest
+from datetime import timedelta
+
+from helpers import BASE, MESSAGES, la, scan_counts, store_counts, timed_lines, write_log
+
+# Lines the mmap engine must hand to the text path: non-ASCII and \x1c-\x1f
+TEXT_ONLY = ['" \x1f404\x1f', '"returnCode"\x1e:\x1e"3"', "ſuccess", "Überweisung passed", "\u212a ERROR"]
+
+
+class EnginesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_dir = self.tmp.name
+        rng = random.Random(12)
+        messages = MESSAGES + TEXT_ONLY
+        for service in ("alpha", "beta"):
+            path = os.path.join(self.log_dir, f"{service}.log")
+            with gzip.open(path + ".2.gz", "wb") as f:
+                lines = timed_lines(rng, 3000, messages=messages, jitter_ms=1000)
+                f.write(("\n".join(lines) + "\n").encode("utf-8"))
+            write_log(path + ".1", timed_lines(rng, 3000, start=BASE + timedelta(minutes=13),
+                                               messages=messages, jitter_ms=1000))
+            write_log(path, timed_lines(rng, 3000, start=BASE + timedelta(minutes=26), messages=messages,
+                                        jitter_ms=1000), terminated=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def compare(self, start, end, **options):
+        counts = {}
+        for engine in ("text", "mmap"):
+            result = la.analyze(start, end, log_dir=self.log_dir, engine=engine, **options)
+            counts[engine] = store_counts(result.store)
+        self.assertEqual(counts["mmap"], counts["text"], (start, end, options))
+        return counts["text"]
+
+    def test_windows_across_plain_and_gzip_segments(self):
+        windows = [(BASE - timedelta(minutes=5), BASE + timedelta(hours=1)),
+                   (BASE + timedelta(minutes=9, seconds=3), BASE + timedelta(minutes=15, seconds=59)),
+                   (BASE + timedelta(minutes=30), BASE + timedelta(minutes=30, seconds=2))]
+        for start, end in windows:
+            counts = self.compare(start, end, granularity=60)
+            self.assertEqual(counts, scan_counts(self.log_dir, start, end, granularity=60))
+
+    def test_filters(self):
+        start, end = BASE + timedelta(minutes=2), BASE + timedelta(minutes=40)
+        self.compare(start, end, log_choice="2")
+        self.compare(start, end, log_choice="1", specific_success="pass")
+        self.compare(start, end, log_choice="3", specific_error="http", granularity=10)
+
+    def test_workers(self):
+        self.compare(BASE, BASE + timedelta(hours=1), workers=2, granularity=300)
+
+
+if __name__ == "__main__":
+    unittest.main()
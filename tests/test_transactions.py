@@ -0,0 +1,50 @@
+import unittest
+from datetime import timedelta
+
+from helpers import BASE, la, log_line
+
+
+def record(seconds, message, exchange=None):
+    if exchange is not None:
+        message = f"exchangeId : '{exchange}' - {message}"
+    line = log_line(BASE + timedelta(seconds=seconds), message)
+    return la.parse_line(line, la.parse_epoch_us(line))
+
+
+class OutcomeLabelsTest(unittest.TestCase):
+
+    def correlate(self, records):
+        store = la.AggregateStore(3600)
+        correlator = la.TransactionCorrelator("svc", la.TransactionStats(), ttl_us=60 * 1000000,
+                                              distinct=store)
+        for r in records:
+            correlator.add(r)
+        outcomes = correlator.close().service_total(correlator.stats.services()["svc"])[0]
+        distinct = {outcome: sketch.estimate()
+                    for (_, _, field, outcome), sketch in store.distinct.items() if field == "referenceNo"}
+        return outcomes, distinct
+
+    def test_outcomes(self):
+        outcomes, distinct = self.correlate([
+            record(0, "Request referenceNo=1 SUCCESS", "ok"),
+            record(1, "Request Received referenceNo=2", "quiet"),
+            record(2, "Account Status Found", "quiet"),
+            record(3, "Performing Operation - 'GET_CHARGES' referenceNo=3", "stuck"),
+            record(4, "lookup for referenceNo=4 without an exchange"),
+            # Idle for longer than the TTL: ok, quiet and stuck end here
+            record(200, "Request Received referenceNo=5", "open"),
+        ])
+        self.assertEqual(outcomes, {"success": 1, "error": 0, "unclassified": 1, "incomplete": 2})
+        self.assertEqual(distinct, {"success": 1, "unclassified": 1, "incomplete": 2, "uncorrelated": 1})
+
+    def test_classified_outcome_wins_over_cut_off(self):
+        outcomes, _ = self.correlate([
+            record(0, "Performing Operation - 'FA_POSTING'", "a"),
+            record(1, "ERROR: posting rejected", "a"),
+        ])
+        self.assertEqual(outcomes["error"], 1)
+        self.assertEqual(outcomes["incomplete"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
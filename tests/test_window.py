@@ -0,0 +1,79 @@
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+from datetime import timedelta
+
+from helpers import BASE, la, log_line, scan_counts, store_counts, timed_lines, write_log
+
+
+class WindowLocatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_dir = self.tmp.name
+        self.path = os.path.join(self.log_dir, "svc.log")
+        la._unordered_warned.clear()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def analyze(self, start, end, engine="text"):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            result = la.analyze(start, end, log_dir=self.log_dir, granularity=60, engine=engine)
+        return store_counts(result.store), stderr.getvalue()
+
+    def assertWindowsAgree(self, windows, warned=False):
+        for start, end in windows:
+            la._unordered_warned.clear()
+            expected = scan_counts(self.log_dir, start, end, granularity=60)
+            for engine in ("text", "mmap"):
+                counts, stderr = self.analyze(start, end, engine)
+                self.assertEqual(counts, expected, (start, end, engine))
+                self.assertEqual("not in time order" in stderr, warned and engine == "text", stderr)
+
+    def random_windows(self, rng, count, span_minutes):
+        windows = []
+        for _ in range(count):
+            start = BASE + timedelta(seconds=rng.randint(-60, span_minutes * 60))
+            windows.append((start, start + timedelta(seconds=rng.randint(1, span_minutes * 30))))
+        return windows
+
+    def test_lines_jittered_within_tolerance(self):
+        rng = random.Random(3)
+        # 250 ms apart, each moved by up to 2.4 s: never more than 4.8 s out of order
+        write_log(self.path, timed_lines(rng, 20000, jitter_ms=2400))
+        with open(self.path, "rb") as f:
+            self.assertTrue(la.in_time_order(f, os.path.getsize(self.path), (), 5000000))
+        self.assertWindowsAgree(self.random_windows(rng, 20, 80))
+
+    def test_line_at_tolerance_edge(self):
+        start = BASE + timedelta(minutes=10)
+        lines = [log_line(BASE + timedelta(seconds=i), "SUCCESS") for i in range(600)]
+        # Written just under ORDER_TOLERANCE_SECONDS after later lines
+        lines += [log_line(start + timedelta(seconds=4, milliseconds=990), "SUCCESS"),
+                  log_line(start, "ERROR: late line at the window start"),
+                  log_line(start + timedelta(minutes=5), "SUCCESS")]
+        lines += [log_line(start + timedelta(minutes=5, seconds=i), "SUCCESS") for i in range(600)]
+        write_log(self.path, lines)
+        counts, _ = self.analyze(start, start + timedelta(minutes=1))
+        self.assertEqual(counts, scan_counts(self.log_dir, start, start + timedelta(minutes=1), granularity=60))
+        self.assertIn(("svc", la.to_epoch_us(start) // 60000000, True, "ERROR"), counts)
+
+    def test_unsorted_file_is_read_whole(self):
+        rng = random.Random(21)
+        # Backdated traffic appended after later lines, as a second bulk run would
+        write_log(self.path, timed_lines(rng, 10000, start=BASE + timedelta(minutes=30)))
+        write_log(self.path, timed_lines(rng, 10000, start=BASE))
+        with open(self.path, "rb") as f:
+            self.assertFalse(la.in_time_order(f, os.path.getsize(self.path), (), 5000000))
+        windows = [(BASE + timedelta(minutes=10), BASE + timedelta(minutes=40))]
+        windows += self.random_windows(rng, 10, 70)
+        self.assertWindowsAgree(windows, warned=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
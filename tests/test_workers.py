@@ -0,0 +1,55 @@
+import os
+import random
+import tempfile
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from helpers import BASE, MESSAGES, la, scan_counts, store_counts, timed_lines, write_log
+
+# Non-ASCII text goes through the decoded path of the mmap engine
+NON_ASCII = MESSAGES + ["SUCCESS für Überweisung ₹500", "ERROR: ſtatus ünknown", "ſuccess"]
+
+
+class PlanSegmentsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_dir = self.tmp.name
+        self.path = os.path.join(self.log_dir, "svc.log")
+        rng = random.Random(4)
+        write_log(self.path, timed_lines(rng, 6000, messages=NON_ASCII), newline="\r\n", terminated=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_ranges_split_at_line_starts(self):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        query = la.Query(la.to_epoch_us(BASE), la.to_epoch_us(BASE + timedelta(hours=1)), "3", None, None)
+        with mock.patch.object(la, "MIN_SPLIT_BYTES", 4096):
+            ranges = la.plan_segments(self.path, query, 7)
+        self.assertEqual(len(ranges), 7)
+        self.assertEqual(ranges[-1][1], len(data))
+        for (begin, end), (following, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, following)
+            self.assertEqual(data[end - 1:end], b"\n")
+
+    def test_workers_match_serial(self):
+        windows = [(BASE, BASE + timedelta(hours=1)),
+                   (BASE + timedelta(minutes=3, seconds=7), BASE + timedelta(minutes=21, seconds=1))]
+        for start, end in windows:
+            expected = scan_counts(self.log_dir, start, end, granularity=60)
+            for engine in ("text", "mmap"):
+                counts = []
+                for workers in (1, 3):
+                    with mock.patch.object(la, "MIN_SPLIT_BYTES", 4096):
+                        result = la.analyze(start, end, log_dir=self.log_dir, workers=workers,
+                                            granularity=60, engine=engine)
+                    counts.append(store_counts(result.store))
+                self.assertEqual(counts[0], expected, (start, end, engine))
+                self.assertEqual(counts[1], counts[0], (start, end, engine))
+
+
+if __name__ == "__main__":
+    unittest.main()